@@ -0,0 +1,351 @@
+"""Catalog Index - O(1) slug/id lookups and pre-built filter groups for the public catalog"""
+
+import itertools
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from models import Product, Project, BlogPost, FAQ, Testimonial, City, ColorFinish, GlassOption, Hardware, ProfileSystem
+
+# Every index build gets a new version; caches derived from the catalog key on it
+_versions = itertools.count(1)
+
+# City landing pages: featured FAQs shown, and product highlights per category
+CITY_FEATURED_FAQS = 5
+CITY_HIGHLIGHTS_PER_CATEGORY = 4
+
+# Fields needed to render each kind of listing card
+PRODUCT_CARD_FIELDS = ("id", "slug", "name", "category", "product_type", "short_description", "hero_image", "is_featured")
+PROJECT_CARD_FIELDS = ("id", "slug", "title", "location", "city", "project_type", "hero_image", "challenge", "is_featured")
+BLOG_CARD_FIELDS = ("id", "slug", "title", "excerpt", "category", "tags", "hero_image", "author", "read_time", "created_at")
+
+# Named projections for the list endpoints; None keeps every field
+VIEWS: Dict[str, Dict[str, Optional[Tuple[str, ...]]]] = {
+    "products": {"card": PRODUCT_CARD_FIELDS, "detail": None},
+    "projects": {"card": PROJECT_CARD_FIELDS, "detail": None},
+    "blog": {"card": BLOG_CARD_FIELDS, "detail": None},
+}
+VIEW_MODELS = {"products": Product, "projects": Project, "blog": BlogPost}
+_NAMED_PROJECTIONS = frozenset(fields for views in VIEWS.values() for fields in views.values())
+
+
+def _index_by(items: Iterable[Any], attr: str) -> Dict[str, Any]:
+    """Map a unique attribute (slug, id) to its item"""
+    return {getattr(item, attr): item for item in items}
+
+
+def _group_by(items: Iterable[Any], key: Callable[[Any], Any]) -> Dict[Any, Tuple[Any, ...]]:
+    """Group items by a key, keeping the original ordering inside every group"""
+    groups: Dict[Any, list] = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+def resolve_fields(kind: str, view: Optional[str] = None, fields: Optional[str] = None) -> Optional[Tuple[str, ...]]:
+    """Field tuple for a list request: an explicit comma-separated `fields` wins over `view`.
+
+    Returned in model order (plus `id`) so equivalent requests share a cache
+    entry; raises ValueError for unknown names.
+    """
+    if fields:
+        model_fields = VIEW_MODELS[kind].model_fields
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(model_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        requested.add("id")
+        return tuple(name for name in model_fields if name in requested)
+    return VIEWS[kind].get(view or "detail")
+
+
+def _group_by_each(items: Iterable[Any], keys: Callable[[Any], Iterable[Any]]) -> Dict[Any, Tuple[Any, ...]]:
+    """Group items under every value of a multi-valued attribute"""
+    groups: Dict[Any, list] = {}
+    for item in items:
+        for key in dict.fromkeys(keys(item)):
+            groups.setdefault(key, []).append(item)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+def _facet_counts(groups: Dict[Any, Tuple[Any, ...]]) -> Dict[str, int]:
+    """{value: items}, largest first, with JSON-friendly keys"""
+    ordered = sorted(groups.items(), key=lambda group: (-len(group[1]), str(group[0])))
+    return {str(value).lower() if isinstance(value, bool) else str(value): len(items) for value, items in ordered}
+
+
+_MM_RE = re.compile(r"(\d+(?:\.\d+)?)\s*mm")
+
+
+def parse_thicknesses(text: Optional[str]) -> Tuple[str, ...]:
+    """Pane/unit thicknesses offered, in mm: "24mm (4+16+4) / 28mm" -> ("24", "28")"""
+    return tuple(f"{float(value):g}" for value in _MM_RE.findall(text or ""))
+
+
+def _select(everything: Tuple[Any, ...], *selections: Tuple[Dict[Any, Tuple[Any, ...]], Any]) -> Tuple[Any, ...]:
+    """Intersect the requested groups, only walking the smallest one.
+
+    Each selection is a ``(groups, key)`` pair; a ``None`` or empty-string key
+    means the filter was not requested (``?category=`` filters nothing, as
+    before the index). Groups keep the base ordering, so the result does too.
+    """
+    candidates = [groups.get(key, ()) for groups, key in selections if key is not None and key != ""]
+    if not candidates:
+        return everything
+    candidates.sort(key=len)
+    result = candidates[0]
+    for other in candidates[1:]:
+        if not result:
+            break
+        members = {id(item) for item in other}
+        result = tuple(item for item in result if id(item) in members)
+    return result
+
+
+class CatalogIndex:
+    """Read-only lookup tables over products, projects, blog posts, FAQs, testimonials and cities.
+
+    Built once from the catalog lists; never mutated afterwards.
+    """
+
+    def __init__(
+        self,
+        products: Iterable[Product],
+        projects: Iterable[Project],
+        blog_posts: Iterable[BlogPost],
+        faqs: Iterable[FAQ],
+        testimonials: Iterable[Testimonial],
+        cities: Iterable[City],
+    ):
+        self.version: int = next(_versions)
+
+        # Products and FAQs are always served sorted by `order`
+        self.products: Tuple[Product, ...] = tuple(sorted(products, key=lambda p: p.order))
+        self.projects: Tuple[Project, ...] = tuple(projects)
+        self.blog_posts: Tuple[BlogPost, ...] = tuple(blog_posts)
+        self.faqs: Tuple[FAQ, ...] = tuple(sorted(faqs, key=lambda f: f.order))
+        self.testimonials: Tuple[Testimonial, ...] = tuple(testimonials)
+        self.cities: Tuple[City, ...] = tuple(cities)
+        self.active_cities: Tuple[City, ...] = tuple(c for c in self.cities if c.is_active)
+
+        # Primary indexes
+        self.product_by_slug: Dict[str, Product] = _index_by(self.products, "slug")
+        self.product_by_id: Dict[str, Product] = _index_by(self.products, "id")
+        self.project_by_slug: Dict[str, Project] = _index_by(self.projects, "slug")
+        self.project_by_id: Dict[str, Project] = _index_by(self.projects, "id")
+        self.blog_post_by_slug: Dict[str, BlogPost] = _index_by(self.blog_posts, "slug")
+        self.blog_post_by_id: Dict[str, BlogPost] = _index_by(self.blog_posts, "id")
+        self.city_by_slug: Dict[str, City] = _index_by(self.cities, "slug")
+        self.city_by_id: Dict[str, City] = _index_by(self.cities, "id")
+
+        # Secondary indexes used by the list endpoints
+        self.products_by_category = _group_by(self.products, lambda p: p.category)
+        self.products_by_type = _group_by(self.products, lambda p: p.product_type)
+        self.products_by_featured = _group_by(self.products, lambda p: p.is_featured)
+        self.projects_by_city = _group_by(self.projects, lambda p: p.city.lower())
+        self.projects_by_type = _group_by(self.projects, lambda p: p.project_type)
+        self.projects_by_featured = _group_by(self.projects, lambda p: p.is_featured)
+        self.blog_posts_by_category = _group_by(self.blog_posts, lambda p: p.category)
+        self.faqs_by_category = _group_by(self.faqs, lambda f: f.category)
+        self.faqs_by_featured = _group_by(self.faqs, lambda f: f.is_featured)
+        self.testimonials_by_featured = _group_by(self.testimonials, lambda t: t.is_featured)
+
+        # Serialized items per (item, named view), filled on first use
+        self._dumps: Dict[Tuple[int, Optional[Tuple[str, ...]]], Dict[str, Any]] = {}
+
+        # City landing pages: join index keyed by city slug
+        self.testimonials_by_city: Dict[str, Tuple[Testimonial, ...]] = {
+            city.slug: tuple(t for t in self.testimonials if city.name in t.location) for city in self.cities
+        }
+        self.product_highlights_by_city: Dict[str, Dict[str, Tuple[Product, ...]]] = {
+            city.slug: self._product_highlights(city) for city in self.cities
+        }
+
+    def _product_highlights(self, city: City) -> Dict[str, Tuple[Product, ...]]:
+        """Featured products per category, product types installed in the city's projects first"""
+        installed: Dict[str, int] = {}
+        for project in self.projects_by_city.get(city.name.lower(), ()):
+            for product_type in project.product_types:
+                installed[product_type] = installed.get(product_type, 0) + 1
+        featured = self.products_by_featured.get(True, ())
+        ranked = sorted(featured, key=lambda p: -installed.get(p.product_type, 0))
+        highlights = _group_by(ranked, lambda p: p.category)
+        return {category: products[:CITY_HIGHLIGHTS_PER_CATEGORY] for category, products in highlights.items()}
+
+    def dump(self, item: Any, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Serialized form of a catalog item restricted to `fields` (None for all).
+
+        Full and named-view dumps are memoized; other projections are cut from
+        the memoized full dump.
+        """
+        if fields in _NAMED_PROJECTIONS:
+            key = (id(item), fields)
+            cached = self._dumps.get(key)
+            if cached is None:
+                cached = self._dumps[key] = item.model_dump(include=set(fields) if fields else None)
+            return cached
+        full = self.dump(item)
+        return {name: full[name] for name in fields}
+
+    def city_bundle(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Everything a city landing page renders, in one payload"""
+        city = self.city_by_slug.get(slug)
+        if not city:
+            return None
+        bundle = city.model_dump()
+        bundle['testimonials'] = [t.model_dump() for t in self.testimonials_by_city[slug]]
+        bundle['projects'] = [self.dump(p) for p in self.projects_by_city.get(city.name.lower(), ())]
+        bundle['faqs'] = [f.model_dump() for f in self.faqs_by_featured.get(True, ())[:CITY_FEATURED_FAQS]]
+        bundle['product_highlights'] = {
+            category: [self.dump(p, PRODUCT_CARD_FIELDS) for p in products]
+            for category, products in self.product_highlights_by_city[slug].items()
+        }
+        return bundle
+
+    # ===================== FILTERS =====================
+    def filter_products(
+        self,
+        category: Optional[str] = None,
+        product_type: Optional[str] = None,
+        featured: Optional[bool] = None,
+    ) -> Tuple[Product, ...]:
+        return _select(
+            self.products,
+            (self.products_by_category, category),
+            (self.products_by_type, product_type),
+            (self.products_by_featured, featured),
+        )
+
+    def filter_projects(
+        self,
+        city: Optional[str] = None,
+        project_type: Optional[str] = None,
+        featured: Optional[bool] = None,
+    ) -> Tuple[Project, ...]:
+        return _select(
+            self.projects,
+            (self.projects_by_city, city.lower() if city else None),
+            (self.projects_by_type, project_type),
+            (self.projects_by_featured, featured),
+        )
+
+    def filter_blog_posts(self, category: Optional[str] = None) -> Tuple[BlogPost, ...]:
+        return _select(self.blog_posts, (self.blog_posts_by_category, category))
+
+    def filter_faqs(self, category: Optional[str] = None, featured: Optional[bool] = None) -> Tuple[FAQ, ...]:
+        return _select(
+            self.faqs,
+            (self.faqs_by_category, category),
+            (self.faqs_by_featured, featured),
+        )
+
+    def filter_testimonials(self, featured: Optional[bool] = None) -> Tuple[Testimonial, ...]:
+        return _select(self.testimonials, (self.testimonials_by_featured, featured))
+
+
+class DesignStudioIndex:
+    """Colour, glass, hardware and profile options with facet groups for filtering.
+
+    Multi-valued attributes (glass thicknesses and best-for uses, hardware
+    finishes) are indexed under each of their values.
+    """
+
+    def __init__(
+        self,
+        colors: Iterable[ColorFinish],
+        glass: Iterable[GlassOption],
+        hardware: Iterable[Hardware],
+        profiles: Iterable[ProfileSystem],
+    ):
+        self.colors: Tuple[ColorFinish, ...] = tuple(colors)
+        self.glass: Tuple[GlassOption, ...] = tuple(glass)
+        self.hardware: Tuple[Hardware, ...] = tuple(hardware)
+        self.profiles: Tuple[ProfileSystem, ...] = tuple(profiles)
+
+        self.color_by_id: Dict[str, ColorFinish] = _index_by(self.colors, "id")
+        self.glass_by_id: Dict[str, GlassOption] = _index_by(self.glass, "id")
+        self.hardware_by_id: Dict[str, Hardware] = _index_by(self.hardware, "id")
+        self.profile_by_id: Dict[str, ProfileSystem] = _index_by(self.profiles, "id")
+
+        # Facet indexes
+        self.colors_by_category = _group_by(self.colors, lambda c: c.category)
+        self.colors_by_popular = _group_by(self.colors, lambda c: c.is_popular)
+        self.glass_by_thickness = _group_by_each(self.glass, lambda g: parse_thicknesses(g.thickness))
+        self.glass_by_best_for = _group_by_each(self.glass, lambda g: g.best_for)
+        self.hardware_by_category = _group_by(self.hardware, lambda h: h.category)
+        self.hardware_by_brand = _group_by(self.hardware, lambda h: h.brand)
+        self.hardware_by_finish = _group_by_each(self.hardware, lambda h: h.finishes)
+
+    # ===================== FILTERS =====================
+    def filter_colors(self, category: Optional[str] = None, popular: Optional[bool] = None) -> Tuple[ColorFinish, ...]:
+        return _select(self.colors, (self.colors_by_category, category), (self.colors_by_popular, popular))
+
+    def filter_glass(self, thickness: Optional[float] = None, best_for: Optional[str] = None) -> Tuple[GlassOption, ...]:
+        return _select(
+            self.glass,
+            (self.glass_by_thickness, f"{thickness:g}" if thickness is not None else None),
+            (self.glass_by_best_for, best_for),
+        )
+
+    def filter_hardware(
+        self,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        finish: Optional[str] = None,
+    ) -> Tuple[Hardware, ...]:
+        return _select(
+            self.hardware,
+            (self.hardware_by_category, category),
+            (self.hardware_by_brand, brand),
+            (self.hardware_by_finish, finish),
+        )
+
+    def facets(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Option counts per facet value, for rendering filter controls"""
+        return {
+            "colors": {
+                "category": _facet_counts(self.colors_by_category),
+                "is_popular": _facet_counts(self.colors_by_popular),
+            },
+            "glass": {
+                "thickness_mm": _facet_counts(self.glass_by_thickness),
+                "best_for": _facet_counts(self.glass_by_best_for),
+            },
+            "hardware": {
+                "category": _facet_counts(self.hardware_by_category),
+                "brand": _facet_counts(self.hardware_by_brand),
+                "finish": _facet_counts(self.hardware_by_finish),
+            },
+        }
+
+    def bundle(self) -> Dict[str, Any]:
+        """Every design studio option plus facet counts, for a single page load"""
+        return {
+            "colors": [c.model_dump() for c in self.colors],
+            "glass": [g.model_dump() for g in self.glass],
+            "hardware": [h.model_dump() for h in self.hardware],
+            "profiles": [p.model_dump() for p in self.profiles],
+            "facets": self.facets(),
+        }
+
+
+def load_design_studio() -> DesignStudioIndex:
+    """Build the design studio index from the comprehensive option lists"""
+    from seed_snapshot import seed_content
+
+    seed = seed_content()
+    return DesignStudioIndex(colors=seed['colors'], glass=seed['glass'], hardware=seed['hardware'], profiles=seed['profiles'])
+
+
+def load_seed_catalog() -> CatalogIndex:
+    """Build the catalog index from the bundled seed data"""
+    from seed_snapshot import seed_content
+
+    seed = seed_content()
+    return CatalogIndex(
+        products=seed['products'],
+        projects=seed['projects'],
+        blog_posts=seed['blog_posts'],
+        faqs=seed['faqs'],
+        testimonials=seed['testimonials'],
+        cities=seed['cities'],
+    )
@@ -0,0 +1,232 @@
+"""Catalog Store - catalog content in MongoDB, seeded from seed_data and watched for edits"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Type
+
+from bson.codec_options import CodecOptions
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+
+from catalog import CatalogIndex
+from models import Product, Project, BlogPost, FAQ, Testimonial, City, now_utc
+
+logger = logging.getLogger(__name__)
+
+# Collection name -> model; the names double as the CatalogIndex arguments
+CATALOG_COLLECTIONS: Dict[str, Type[BaseModel]] = {
+    "products": Product,
+    "projects": Project,
+    "blog_posts": BlogPost,
+    "faqs": FAQ,
+    "testimonials": Testimonial,
+    "cities": City,
+}
+
+# Single document {_id: "catalog", version, updated_at}. Editors that write to the
+# catalog collections without change streams available bump it (see bump_catalog_version)
+META_COLLECTION = "catalog_meta"
+META_ID = "catalog"
+
+# Catalog dates come back timezone-aware, as the seed models define them
+CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+
+def catalog_collection(db, name: str):
+    return db.get_collection(name, codec_options=CODEC_OPTIONS)
+
+
+async def current_version(db) -> int:
+    meta = await db[META_COLLECTION].find_one({"_id": META_ID})
+    return meta['version'] if meta else 0
+
+
+async def bump_catalog_version(db) -> int:
+    """Mark the catalog as edited so polling workers reload it"""
+    meta = await db[META_COLLECTION].find_one_and_update(
+        {"_id": META_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": now_utc()}},
+        upsert=True,
+        return_document=True,
+    )
+    return meta['version']
+
+
+async def seed_catalog(db) -> Dict[str, int]:
+    """Copy the bundled seed data into every catalog collection that is still empty.
+
+    Safe to run from several workers at once: each item is an upsert on its
+    unique id, so a worker that loses the race inserts nothing. The upserts
+    run in seed order, which keeps the server-assigned _ids in seed order too.
+    """
+    from seed_snapshot import seed_content
+
+    seed = seed_content()
+    inserted: Dict[str, int] = {}
+    for name in CATALOG_COLLECTIONS:
+        collection = catalog_collection(db, name)
+        await collection.create_index("id", unique=True)
+        if await collection.find_one({}, {"_id": 1}) is not None:
+            continue
+        result = await collection.bulk_write([
+            UpdateOne({"id": item.id}, {"$setOnInsert": item.model_dump()}, upsert=True) for item in seed[name]
+        ], ordered=True)
+        if result.upserted_count:
+            inserted[name] = result.upserted_count
+    if inserted:
+        await bump_catalog_version(db)
+        logger.info(f"Seeded catalog collections: {inserted}")
+    return inserted
+
+
+def _validate(name: str, docs: List[dict]) -> List[BaseModel]:
+    """Validated items; a malformed document is skipped rather than failing the whole catalog"""
+    model = CATALOG_COLLECTIONS[name]
+    items = []
+    for doc in docs:
+        try:
+            items.append(model.model_validate(doc))
+        except ValidationError as e:
+            logger.warning(f"Skipping invalid {name} document {doc.get('id')}: {e.error_count()} errors")
+    return items
+
+
+async def load_catalog(db) -> CatalogIndex:
+    """Read every catalog collection and build a fresh index (validation runs off the event loop)"""
+    docs = {
+        name: await catalog_collection(db, name).find({}, {"_id": 0}).sort("_id", 1).to_list(length=None)
+        for name in CATALOG_COLLECTIONS
+    }
+    return await asyncio.to_thread(
+        lambda: CatalogIndex(**{name: _validate(name, items) for name, items in docs.items()})
+    )
+
+
+class CatalogWatcher:
+    """Calls `reload` whenever the catalog collections change.
+
+    Uses a change stream on the catalog collections when the deployment
+    supports one (replica sets, Atlas) and otherwise polls the catalog_meta
+    version. Bursts of edits are coalesced into a single reload.
+    """
+
+    def __init__(
+        self,
+        db,
+        reload: Callable[[], Awaitable[None]],
+        poll_interval: float = 30.0,
+        debounce: float = 0.5,
+        change_streams: bool = True,
+    ):
+        self.db = db
+        self.reload = reload
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.change_streams = change_streams
+        self.mode: Optional[str] = None  # "change_stream" or "polling" once running
+        self.reloads = 0
+        self._version = 0
+        self._changed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, loaded_version: Optional[int] = None) -> bool:
+        """Seed and load the catalog unless `loaded_version` is still current, then follow edits.
+
+        Never raises: when MongoDB cannot be reached the first load is retried
+        every poll interval in the background, and the bundled seed catalog
+        keeps serving until it succeeds. Returns whether the first attempt did.
+        """
+        loaded = await self._load(loaded_version)
+        self._tasks = [asyncio.create_task(self._run(loaded_version, loaded))]
+        return loaded
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _load(self, loaded_version: Optional[int]) -> bool:
+        try:
+            # Read before reloading, so an edit landing mid-reload still triggers another
+            self._version = await current_version(self.db)
+            if self._version != loaded_version:
+                await seed_catalog(self.db)
+                self._version = await current_version(self.db)
+                await self.reload()
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Catalog not loaded from MongoDB, serving the bundled seed catalog; "
+                f"retrying in {self.poll_interval:g}s: {e}"
+            )
+            return False
+
+    async def _run(self, loaded_version: Optional[int], loaded: bool) -> None:
+        while not loaded:
+            await asyncio.sleep(self.poll_interval)
+            loaded = await self._load(loaded_version)
+        await asyncio.gather(self._watch_or_poll(), self._reload_loop())
+
+    async def _watch_or_poll(self) -> None:
+        if self.change_streams:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Catalog change streams unavailable ({e}); polling every {self.poll_interval:g}s")
+        await self._poll()
+
+    async def _watch(self) -> None:
+        """Follow the change stream; raises if it cannot be opened at all"""
+        pipeline = [{"$match": {"ns.coll": {"$in": [*CATALOG_COLLECTIONS, META_COLLECTION]}}}]
+        established = False
+        while True:
+            try:
+                async with self.db.watch(pipeline) as stream:
+                    # try_next opens the cursor, so an unsupported deployment fails here
+                    change = await stream.try_next()
+                    if not established:
+                        established = True
+                        self.mode = "change_stream"
+                        logger.info("Watching catalog collections through a change stream")
+                    if change is not None:
+                        self._changed.set()
+                    async for _ in stream:
+                        self._changed.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not established:
+                    raise
+                # Edits may have landed while the stream was down
+                logger.warning(f"Catalog change stream interrupted ({e}); reconnecting")
+                self._changed.set()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                version = await current_version(self.db)
+            except Exception as e:
+                logger.warning(f"Catalog version check failed: {e}")
+                continue
+            if version != self._version:
+                self._version = version
+                self._changed.set()
+
+    async def _reload_loop(self) -> None:
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            try:
+                await self.reload()
+                self.reloads += 1
+            except Exception as e:
+                logger.error(f"Catalog reload failed, keeping the current snapshot: {e}")
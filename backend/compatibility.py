@@ -0,0 +1,161 @@
+"""Configuration Compatibility - bitset matrices answering which design studio options fit together"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from catalog import CatalogIndex, DesignStudioIndex
+from models import Hardware, Product
+from specs import SpecIndex
+
+DIMENSIONS = ("product", "profile", "glass", "hardware", "color")
+
+# Product types with an opening sash (everything except fixed lights)
+OPENING_TYPES = ("casement", "sliding", "tilt_turn", "top_hung", "french", "bifold", "lift_slide")
+
+# Which products each hardware item fits; a missing key means no restriction
+HARDWARE_FITS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "hw-hoppe-secustic": {"category": ("windows",), "product_type": ("casement", "tilt_turn", "top_hung", "french")},
+    "hw-roto-swing": {"product_type": ("tilt_turn",)},
+    "hw-siegenia-favorit": {"product_type": ("tilt_turn",)},
+    "hw-gu-multilock": {"product_type": OPENING_TYPES},
+    "hw-roto-safe": {"category": ("doors",), "product_type": ("casement",)},
+    "hw-yale-cylinder": {"category": ("doors",)},
+    "hw-roto-nt-hinge": {"product_type": ("tilt_turn",)},
+    "hw-friction-stay": {"category": ("windows",), "product_type": ("casement", "top_hung")},
+    "hw-child-restrictor": {"category": ("windows",), "product_type": OPENING_TYPES},
+    "hw-tandem-roller": {"product_type": ("sliding",)},
+    "hw-lift-slide-gear": {"product_type": ("lift_slide",)},
+    "hw-mesh-fiberglass": {"product_type": OPENING_TYPES},
+    "hw-mesh-ss": {"product_type": OPENING_TYPES},
+    "hw-mesh-pleated": {"product_type": OPENING_TYPES},
+    "hw-trickle-vent": {"category": ("windows",)},
+}
+
+INFINITY = float("inf")
+
+
+def _limit(value: Optional[float]) -> float:
+    """Parsed limit, or no limit when the spec does not state one"""
+    return INFINITY if value is None else value
+
+
+def hardware_fits(hardware: Hardware, product: Product) -> bool:
+    fits = HARDWARE_FITS.get(hardware.id, {})
+    return all(getattr(product, attribute) in allowed for attribute, allowed in fits.items())
+
+
+def _bits(positions: Iterable[int]) -> int:
+    mask = 0
+    for position in positions:
+        mask |= 1 << position
+    return mask
+
+
+class CompatibilitySolver:
+    """Pairwise compatibility rules compiled into bitsets at startup.
+
+    For every constrained pair of dimensions, ``matrix[(a, b)][i]`` is an int
+    whose set bits are the options of ``b`` that work with option ``i`` of
+    ``a``. Answering a query is a handful of ANDs: each selected option
+    narrows every other dimension, and each unselected dimension narrows the
+    others to what at least one of its remaining options allows.
+    """
+
+    def __init__(self, catalog: CatalogIndex, design_studio: DesignStudioIndex, specs: SpecIndex):
+        products = catalog.products
+        self.options: Dict[str, Tuple[str, ...]] = {
+            "product": tuple(p.slug for p in products),
+            "profile": tuple(p.id for p in design_studio.profiles),
+            "glass": tuple(g.id for g in design_studio.glass),
+            "hardware": tuple(h.id for h in design_studio.hardware),
+            "color": tuple(c.id for c in design_studio.colors),
+        }
+        self.positions: Dict[str, Dict[str, int]] = {
+            dim: {option: i for i, option in enumerate(ids)} for dim, ids in self.options.items()
+        }
+        self.full: Dict[str, int] = {dim: (1 << len(ids)) - 1 for dim, ids in self.options.items()}
+
+        product_specs = [specs.products[p.slug] for p in products]
+        self.size_limits = [(_limit(p.max_width_mm), _limit(p.max_height_mm)) for p in product_specs]
+        product_glass = [_limit(p.max_glass_mm) for p in product_specs]
+        glass_thickness = [specs.glass[g.id].min_thickness_mm or 0.0 for g in design_studio.glass]
+        profile_glass = [_limit(specs.profiles[p.id].max_glass_mm) for p in design_studio.profiles]
+
+        self.matrix: Dict[Tuple[str, str], List[int]] = {}
+        self._compile("profile", "glass", lambda i, j: glass_thickness[j] <= profile_glass[i])
+        self._compile("product", "glass", lambda i, j: glass_thickness[j] <= product_glass[i])
+        self._compile("product", "hardware", lambda i, j: hardware_fits(design_studio.hardware[j], products[i]))
+
+    def _compile(self, first: str, second: str, compatible) -> None:
+        """Evaluate a rule over every pair once and store it in both directions"""
+        size_first, size_second = len(self.options[first]), len(self.options[second])
+        self.matrix[(first, second)] = [
+            _bits(j for j in range(size_second) if compatible(i, j)) for i in range(size_first)
+        ]
+        self.matrix[(second, first)] = [
+            _bits(i for i in range(size_first) if compatible(i, j)) for j in range(size_second)
+        ]
+
+    def size_mask(self, width_mm: Optional[float], height_mm: Optional[float]) -> int:
+        """Products whose size limits admit the opening"""
+        if width_mm is None and height_mm is None:
+            return self.full["product"]
+        return _bits(
+            i for i, (max_width, max_height) in enumerate(self.size_limits)
+            if (width_mm is None or width_mm <= max_width) and (height_mm is None or height_mm <= max_height)
+        )
+
+    def _ids(self, dim: str, mask: int) -> List[str]:
+        return [option for i, option in enumerate(self.options[dim]) if mask >> i & 1]
+
+    def solve(
+        self,
+        selections: Mapping[str, Sequence[str]],
+        width_mm: Optional[float] = None,
+        height_mm: Optional[float] = None,
+    ) -> Dict[str, object]:
+        """Options still valid in every dimension, plus selected options that conflict"""
+        allowed = dict(self.full)
+        allowed["product"] &= self.size_mask(width_mm, height_mm)
+        selected: Dict[str, int] = {}
+        for dim, ids in selections.items():
+            if not ids:
+                continue
+            if dim not in self.positions:
+                raise ValueError(f"Unknown dimension: {dim}")
+            mask = 0
+            for option in ids:
+                position = self.positions[dim].get(option)
+                if position is None:
+                    raise ValueError(f"Unknown {dim}: {option}")
+                mask |= 1 << position
+                for other in DIMENSIONS:
+                    row = self.matrix.get((dim, other))
+                    if row is not None:
+                        allowed[other] &= row[position]
+            selected[dim] = mask
+
+        # Unselected dimensions only allow what one of their remaining options works with
+        for dim in DIMENSIONS:
+            if dim in selected:
+                continue
+            for other in DIMENSIONS:
+                row = self.matrix.get((dim, other))
+                if row is None:
+                    continue
+                union, remaining = 0, allowed[dim]
+                while remaining:
+                    low = remaining & -remaining
+                    union |= row[low.bit_length() - 1]
+                    remaining ^= low
+                allowed[other] &= union
+
+        conflicts = [
+            {"dimension": dim, "id": option}
+            for dim, mask in selected.items()
+            for option in self._ids(dim, mask & ~allowed[dim])
+        ]
+        return {
+            "valid": not conflicts,
+            "options": {dim: self._ids(dim, allowed[dim]) for dim in DIMENSIONS},
+            "conflicts": conflicts,
+        }
@@ -0,0 +1,185 @@
+"""Response Compression - gzip/brotli content negotiation for the app"""
+
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from http_cache import accepts_encoding
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression would not pay for the headers
+MIN_COMPRESS_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '500'))
+
+# Levels for per-request compression; variants built ahead of traffic use the maximum (see compress)
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Most preferred first
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/xml",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The best content-coding both sides support, or None for identity"""
+    for coding in SUPPORTED_ENCODINGS:
+        if accepts_encoding(accept_encoding, coding):
+            return coding
+    return None
+
+
+def request_encoding(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            return negotiate_encoding(value.decode("latin-1"))
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """Distinct strong validator for an encoded representation: "abc" -> "abc-gzip\""""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{coding}"'
+    return etag
+
+
+def compress(body: bytes, coding: str, best: bool = False) -> bytes:
+    """One-shot compression; `best` (brotli 11 / gzip 9) costs tens of ms, so only use it off the request path"""
+    if coding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return zlib.compress(body, 9 if best else GZIP_LEVEL, wbits=31)
+
+
+class StreamCompressor:
+    """Incremental compressor for streamed response bodies"""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, wbits=31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            # Flush per chunk so streamed rows reach the client without waiting on the window
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for position, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[position] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts.
+
+    Responses that already carry a Content-Encoding (precompressed catalog
+    payloads, stored sitemaps) pass through untouched. Whole bodies are
+    compressed in one go; streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        coding = request_encoding(scope)
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = None
+                encoded = False
+                for name, value in headers:
+                    lower = name.lower()
+                    if lower == b"content-type":
+                        content_type = value.decode("latin-1")
+                    elif lower == b"content-encoding":
+                        encoded = True
+                if encoded or not is_compressible(content_type) or message["status"] in (204, 304):
+                    passthrough = True
+                    await send(message)
+                    return
+                message = {**message, "headers": _with_vary(headers)}
+                if coding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                # Hold the headers until the first body chunk shows how large the response is
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    await send(message)
+                    start = None
+                    passthrough = True
+                    return
+                headers = [
+                    (name, encoded_etag(value.decode("latin-1"), coding).encode("latin-1"))
+                    if name.lower() == b"etag" else (name, value)
+                    for name, value in start["headers"]
+                    if name.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", coding.encode("latin-1")))
+                if more_body:
+                    compressor = StreamCompressor(coding)
+                    body = compressor.compress(body)
+                else:
+                    body = compress(body, coding)
+                    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                await send({**start, "headers": headers})
+                start = None
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            # Later chunks of a streamed body
+            body = compressor.compress(body)
+            if not more_body:
+                body += compressor.finish()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,167 @@
+"""HTTP Caching - Cache-Control policies per route and ETag revalidation for the /api router"""
+
+import hashlib
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Named Cache-Control policies; each one can be overridden from the environment,
+# e.g. CACHE_CONTROL_CATALOG="public, max-age=60"
+DEFAULT_CACHE_POLICIES: Dict[str, str] = {
+    "catalog": "public, max-age=3600, stale-while-revalidate=86400",
+    "leads": "no-store",
+    "no_store": "no-store",
+}
+
+# Path -> policy name. A path matches an entry exactly or, unless the entry ends
+# in "/", as a parent segment; first match wins, anything else under /api uses
+# the catalog policy.
+ROUTE_CACHE_POLICIES: Tuple[Tuple[str, str], ...] = (
+    ("/api/", "no_store"),
+    ("/api/health", "no_store"),
+    ("/api/metrics", "no_store"),
+    ("/api/leads", "leads"),
+)
+DEFAULT_ROUTE_POLICY = "catalog"
+
+
+def route_policy(path: str, routes: Iterable[Tuple[str, str]] = ROUTE_CACHE_POLICIES) -> str:
+    """Name of the policy that applies to a request path"""
+    for route, name in routes:
+        if path == route or (not route.endswith("/") and path.startswith(route + "/")):
+            return name
+    return DEFAULT_ROUTE_POLICY
+
+
+def load_cache_policies() -> Dict[str, str]:
+    """Default policies with CACHE_CONTROL_<NAME> environment overrides applied"""
+    return {
+        name: os.environ.get(f"CACHE_CONTROL_{name.upper()}", value)
+        for name, value in DEFAULT_CACHE_POLICIES.items()
+    }
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong validator derived from the response bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows the given content-coding"""
+    if not accept_encoding:
+        return False
+    wildcard = False
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if name not in (coding, "*"):
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name == coding:
+            return quality > 0
+        wildcard = quality > 0
+    return wildcard
+
+
+class HTTPCacheMiddleware:
+    """Adds Cache-Control to /api GET responses and answers conditional requests with 304.
+
+    Handlers opt into revalidation by emitting an ETag header (the response
+    cache does this for every catalog payload); the middleware then compares it
+    with If-None-Match and drops the body when the client copy is current.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Optional[Dict[str, str]] = None,
+        routes: Iterable[Tuple[str, str]] = ROUTE_CACHE_POLICIES,
+        prefix: str = "/api",
+    ):
+        self.app = app
+        self.policies = policies if policies is not None else load_cache_policies()
+        self.routes = tuple(routes)
+        self.prefix = prefix
+        self._encoded = {name: value.encode("latin-1") for name, value in self.policies.items()}
+
+    def policy_for(self, path: str) -> bytes:
+        return self._encoded[route_policy(path, self.routes)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cache_control = self.policy_for(scope["path"])
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        not_modified = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal not_modified
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                etag = None
+                has_cache_control = False
+                for name, value in headers:
+                    lower = name.lower()
+                    if lower == b"etag":
+                        etag = value.decode("latin-1")
+                    elif lower == b"cache-control":
+                        has_cache_control = True
+                if not has_cache_control:
+                    # Error responses must never be cached under the catalog policy
+                    headers.append((b"cache-control", cache_control if message["status"] < 400 else b"no-store"))
+
+                if (
+                    if_none_match is not None
+                    and etag is not None
+                    and message["status"] == 200
+                    and etag_matches(if_none_match, etag)
+                ):
+                    not_modified = True
+                    # A 304 carries the validators but no body or body-specific headers
+                    headers = [
+                        (name, value) for name, value in headers
+                        if name.lower() not in (b"content-length", b"content-type")
+                    ]
+                    message = {"type": "http.response.start", "status": 304, "headers": headers}
+                else:
+                    message = {**message, "headers": headers}
+                await send(message)
+            elif not_modified:
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
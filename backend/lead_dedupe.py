@@ -0,0 +1,132 @@
+"""Lead Deduplication - merge repeat submissions from the same phone into the open lead"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from models import as_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# A lead in one of these states no longer absorbs new submissions
+CLOSED_STATUSES = ("won", "lost")
+
+# Recorded per submission in the lead's `submissions` history
+SUBMISSION_FIELDS = (
+    "lead_type", "project_type", "measurements", "preferences", "message", "source", "city",
+    "configuration", "estimate",
+)
+
+# Filled on the existing lead when it does not have a value yet
+FILLABLE_FIELDS = ("email", "city", "project_type", "measurements", "preferences", "configuration", "estimate")
+
+# Only the most recent submissions are kept on the document
+MAX_SUBMISSIONS = 50
+
+
+def dedupe_key(doc: Dict[str, Any]) -> str:
+    """Identity of a lead for deduplication: its normalized (E.164) phone"""
+    return doc['phone']
+
+
+def is_dedupe_conflict(error: Dict[str, Any]) -> bool:
+    """Whether a bulk write error is a collision on the dedupe_key unique index"""
+    if error.get("code") != DUPLICATE_KEY_ERROR:
+        return False
+    key_pattern = error.get("keyPattern")
+    if key_pattern is not None:
+        return "dedupe_key" in key_pattern
+    return "dedupe_key" in error.get("errmsg", "")
+
+
+class LeadDeduplicator:
+    """Time-windowed merge of lead submissions, backed by a unique `dedupe_key` index.
+
+    Exactly one open lead per phone holds the key. A new submission is merged
+    into that lead when it was active within `window`; otherwise the old lead
+    releases the key (it stays in the collection) and the submission becomes
+    a new lead.
+    """
+
+    def __init__(self, collection, window: timedelta = timedelta(days=30)):
+        self.collection = collection
+        self.window = window
+        self.merged = 0
+
+    async def find_active(self, key: str) -> Optional[Dict[str, Any]]:
+        """The open lead holding `key`, releasing the key if that lead is stale or closed"""
+        existing = await self.collection.find_one({"dedupe_key": key}, {"_id": 0})
+        if not existing:
+            return None
+        last_activity = as_utc_datetime(existing.get('updated_at'))
+        stale = last_activity is None or datetime.now(timezone.utc) - last_activity > self.window
+        if stale or existing.get('status') in CLOSED_STATUSES:
+            await self.collection.update_one(
+                {"id": existing['id'], "dedupe_key": key},
+                {"$unset": {"dedupe_key": ""}}
+            )
+            return None
+        return existing
+
+    @staticmethod
+    def _fold(existing: Dict[str, Any], doc: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(submission history entry, fields to fill on the existing lead) for one repeat submission"""
+        submission = {field: doc[field] for field in SUBMISSION_FIELDS if doc.get(field) is not None}
+        # The id the submitter was given keeps resolving to the lead it was merged into
+        submission['id'] = doc['id']
+        submission['created_at'] = doc['created_at']
+        fills = {field: doc[field] for field in FILLABLE_FIELDS if doc.get(field) and not existing.get(field)}
+        return submission, fills
+
+    def absorb(self, queued: Dict[str, Any], doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold a submission into a lead still waiting in the ingest queue, in place"""
+        submission, fills = self._fold(queued, doc)
+        queued.update(fills)
+        queued['updated_at'] = doc['updated_at']
+        queued['submissions'] = [*queued.get('submissions', []), submission][-MAX_SUBMISSIONS:]
+        queued['submission_count'] = queued.get('submission_count', 1) + 1
+        self.merged += 1
+        logger.info(f"Lead submission merged into queued lead {queued['id']}")
+        return queued
+
+    async def merge(self, existing: Dict[str, Any], doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one submission into an existing lead; returns the merged lead"""
+        submission, fills = self._fold(existing, doc)
+        await self.collection.update_one(
+            {"id": existing['id']},
+            {
+                "$set": {**fills, "updated_at": doc['updated_at']},
+                "$push": {"submissions": {"$each": [submission], "$slice": -MAX_SUBMISSIONS}},
+                "$inc": {"submission_count": 1},
+            }
+        )
+        self.merged += 1
+        logger.info(f"Lead submission merged into {existing['id']}")
+        return {
+            **existing,
+            **fills,
+            "updated_at": doc['updated_at'],
+            "submission_count": existing.get('submission_count', 1) + 1,
+        }
+
+    async def merge_or_insert(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve a dedupe_key collision raised while inserting `doc`"""
+        for _ in range(3):
+            existing = await self.find_active(doc['dedupe_key'])
+            if existing and existing['id'] == doc['id']:
+                # Replayed lead that had already been written
+                return existing
+            if existing:
+                return await self.merge(existing, doc)
+            try:
+                await self.collection.insert_one(doc)
+                return doc
+            except DuplicateKeyError:
+                # Another submission took the key between our read and write
+                continue
+        logger.error(f"Could not resolve duplicate lead for {doc['id']}")
+        return doc
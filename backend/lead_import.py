@@ -0,0 +1,270 @@
+"""Bulk Lead Import - streaming CSV/NDJSON/JSON parsing, LeadCreate validation and unordered batch inserts"""
+
+import asyncio
+import csv
+import codecs
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from models import LeadCreate, generate_id, now_utc
+from lead_dedupe import dedupe_key, is_dedupe_conflict
+
+IMPORT_BATCH_SIZE = 2000
+
+# Errors past this many rows are counted but not itemized in the report
+MAX_REPORTED_ERRORS = 1000
+
+# A single JSON array element larger than this is treated as malformed input
+MAX_JSON_ELEMENT_BYTES = 1024 * 1024
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "json",
+}
+
+# Prices a lead's configuration (list of QuoteOpening dumps); None if it cannot be priced
+Estimator = Callable[[List[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+# (row number, parsed row or None, parse error or None)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return IMPORT_FORMATS.get(media_type)
+
+
+async def _iter_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Physical lines of the body, without line terminators"""
+    pending = ""
+    async for text in _iter_text(chunks):
+        pending += text
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """CSV with a header row; quoted fields may span lines"""
+    header: Optional[List[str]] = None
+    record = ""
+    row_number = 0
+    async for line in _iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            # Inside a quoted field that continues on the next line
+            continue
+        current, record = record, ""
+        if not current.strip():
+            continue
+        values = next(csv.reader([current]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, {name: value for name, value in zip(header, values) if value.strip() != ""}, None
+    if record:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    row_number = 0
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as exc:
+            yield row_number, None, f"Invalid JSON: {exc}"
+
+
+async def parse_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """Elements of a top-level JSON array, decoded one at a time as bytes arrive"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    finished = False
+    row_number = 0
+    async for text in _iter_text(chunks):
+        buffer = buffer[position:] + text
+        position = 0
+        while not finished:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    yield 1, None, "Expected a JSON array"
+                    return
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                finished = True
+                break
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if len(buffer) - position > MAX_JSON_ELEMENT_BYTES:
+                    yield row_number + 1, None, "Malformed JSON element"
+                    return
+                # Element continues in the next chunk
+                break
+            row_number += 1
+            position = end
+            yield row_number, element, None
+        if finished:
+            return
+    if not finished:
+        yield row_number + 1, None, "Unexpected end of JSON array"
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson, "json": parse_json_array}
+
+
+class ImportReport:
+    """Running totals plus the per-row error list returned to the caller"""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.merged = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row: int, errors: Any) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "merged": self.merged,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _validation_errors(exc: ValidationError) -> List[Dict[str, str]]:
+    return [{"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]} for err in exc.errors()]
+
+
+async def _insert_batch(
+    collection,
+    batch: List[Tuple[int, Dict[str, Any]]],
+    report: ImportReport,
+    on_conflict: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]],
+) -> None:
+    try:
+        result = await collection.insert_many([doc for _, doc in batch], ordered=False)
+        report.inserted += len(result.inserted_ids)
+    except BulkWriteError as exc:
+        write_errors = exc.details.get("writeErrors", [])
+        report.inserted += exc.details.get("nInserted", len(batch) - len(write_errors))
+        for err in write_errors:
+            row_number, doc = batch[err["index"]]
+            if on_conflict and is_dedupe_conflict(err):
+                # Same phone as an open lead: fold the row into it
+                merged = await on_conflict(doc)
+                if merged.get('id') == doc['id']:
+                    report.inserted += 1
+                else:
+                    report.merged += 1
+                continue
+            report.add_error(row_number, [{"field": "", "message": err.get("errmsg", "Write failed")}])
+
+
+def build_lead_doc(
+    row: Dict[str, Any],
+    source: str,
+    timestamp: datetime,
+    estimator: Optional[Estimator] = None,
+) -> Dict[str, Any]:
+    """Validate one input row into a lead document ready for insertion.
+
+    Produces the same document as `Lead(**LeadCreate(...).model_dump())` in
+    create_lead, without running a second model validation per row.
+    """
+    data = LeadCreate.model_validate(row).model_dump()
+    if not row.get("source"):
+        data["source"] = source
+    estimate = estimator(data["configuration"]) if estimator and data["configuration"] else None
+    doc = {
+        "id": generate_id(), **data, "estimate": estimate, "status": "new", "submission_count": 1,
+        "created_at": timestamp, "updated_at": timestamp,
+    }
+    doc['dedupe_key'] = dedupe_key(doc)
+    return doc
+
+
+async def import_leads(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    collection,
+    source: str = "bulk_import",
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_conflict: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    estimator: Optional[Estimator] = None,
+) -> ImportReport:
+    """Parse, validate and insert leads; one batch is written while the next is parsed"""
+    report = ImportReport()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    in_flight: Optional[asyncio.Task] = None
+    # Rows of one batch share a timestamp; ids keep (created_at, id) ordering unique
+    timestamp = now_utc()
+
+    async for row_number, row, error in PARSERS[fmt](chunks):
+        report.received += 1
+        if error is not None:
+            report.add_error(row_number, [{"field": "", "message": error}])
+            continue
+        if not isinstance(row, dict):
+            report.add_error(row_number, [{"field": "", "message": "Row must be an object"}])
+            continue
+        try:
+            batch.append((row_number, build_lead_doc(row, source, timestamp, estimator)))
+        except ValidationError as exc:
+            report.add_error(row_number, _validation_errors(exc))
+            continue
+        if len(batch) >= batch_size:
+            if in_flight:
+                await in_flight
+            in_flight = asyncio.create_task(_insert_batch(collection, batch, report, on_conflict))
+            batch = []
+            timestamp = now_utc()
+
+    if in_flight:
+        await in_flight
+    if batch:
+        await _insert_batch(collection, batch, report, on_conflict)
+    return report
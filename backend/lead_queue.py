@@ -0,0 +1,350 @@
+"""Lead Ingestion Queue - write-behind batching of new leads into insert_many calls"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from lead_dedupe import DUPLICATE_KEY_ERROR, is_dedupe_conflict
+
+logger = logging.getLogger(__name__)
+
+# Extended JSON keeps datetimes as {"$date": ...}, so replayed leads get BSON dates back
+JOURNAL_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS.with_options(tz_aware=True)
+
+
+class LeadQueueFull(RuntimeError):
+    """max_depth leads are waiting and MongoDB is not taking them"""
+
+
+def _process_alive(owner: str) -> bool:
+    """Whether the process a journal is named after still runs; non-pid owners are never claimed"""
+    try:
+        os.kill(int(owner), 0)
+    except ValueError:
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class LeadIngestQueue:
+    """Buffers validated lead documents and flushes them with unordered insert_many.
+
+    A batch is written when it reaches `batch_size` documents or when the
+    oldest buffered lead has waited `flush_interval` seconds. With a journal
+    path configured every lead is appended to a local NDJSON file before it is
+    acknowledged, so a crash loses no acknowledged lead. Each process writes
+    its own journal (`<stem>.<pid><suffix>` next to `journal_path`) and
+    truncates it once its buffer has been fully written; on start a process
+    claims and replays the journals of processes that are no longer running.
+    Leads rejected by the dedupe_key unique index are handed to `on_conflict`;
+    a lead whose dedupe_key matches one still queued is folded into that one
+    by `on_duplicate` instead, so the id given to the client always survives.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_depth: int = 10000,
+        journal_path: Optional[Path] = None,
+        fsync: bool = False,
+        on_conflict: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+        on_duplicate: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_depth = max_depth
+        self.journal_path = journal_path
+        self.fsync = fsync
+        self.on_conflict = on_conflict
+        self.on_duplicate = on_duplicate
+        self.worker_id = worker_id
+        self.journal_file: Optional[Path] = None
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_by_key: Dict[str, Dict[str, Any]] = {}
+        self._writing: Set[str] = set()  # ids in the batch being inserted right now
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._journal = None
+        self._closing = False
+
+        # Reporting
+        self.enqueued = 0
+        self.flushed = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Leads acknowledged but not yet written to Mongo"""
+        return len(self._pending)
+
+    # ===================== LIFECYCLE =====================
+    async def start(self) -> None:
+        if self.journal_path:
+            # Resolved here rather than in __init__: workers forked after import get their own pid
+            owner = self.worker_id or str(os.getpid())
+            self.journal_file = self.journal_path.with_name(f"{self.journal_path.stem}.{owner}{self.journal_path.suffix}")
+            replayed = len(self._replay_journal(self.journal_file))
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+            for orphan in self._claim_orphaned_journals():
+                replayed += self._adopt_journal(orphan)
+            if replayed:
+                logger.info(f"Lead queue replaying {replayed} journaled leads")
+                self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def drain(self) -> None:
+        """Flush everything still buffered and stop the background writer"""
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        while self._buffer:
+            if not await self._flush_or_log():
+                logger.error(f"Lead queue stopped with {self.depth} unwritten leads")
+                break
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+            if not self._pending:
+                # Nothing left to recover; per-process journals would otherwise pile up across restarts
+                self.journal_file.unlink(missing_ok=True)
+
+    # ===================== PRODUCER SIDE =====================
+    async def enqueue(self, doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Durably accept one lead document for a later batched insert.
+
+        Returns None when `doc` was queued, or the surviving lead when it was
+        merged into a queued lead with the same dedupe_key (or, if that lead
+        was being written meanwhile, through `on_conflict`). Raises
+        LeadQueueFull when the queue is at max_depth and cannot be flushed.
+        """
+        if len(self._pending) >= self.max_depth:
+            # Backpressure: make room before accepting more, never grow past the limit
+            await self._flush_or_log()
+            if len(self._pending) >= self.max_depth:
+                self.rejected += 1
+                raise LeadQueueFull(f"{self.depth} leads are waiting for MongoDB")
+        key = doc.get('dedupe_key')
+        while key and self.on_duplicate:
+            queued = self._pending_by_key.get(key)
+            if queued is None:
+                break
+            if queued['id'] not in self._writing:
+                merged = self.on_duplicate(queued, doc)
+                self._journal_write(merged)  # the later line wins on replay
+                return merged
+            # Its batch is in flight: wait for it, then merge through Mongo if it landed
+            async with self._flush_lock:
+                pass
+            if key not in self._pending_by_key and self.on_conflict:
+                return await self.on_conflict(doc)
+        self._journal_write(doc)
+        self._buffer.append(doc)
+        self._pending[doc['id']] = doc
+        if key:
+            self._pending_by_key[key] = doc
+        self.enqueued += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def find_pending(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        """A lead that was acknowledged but has not reached Mongo yet"""
+        return self._pending.get(lead_id)
+
+    def _journal_write(self, doc: Dict[str, Any]) -> None:
+        if self._journal:
+            self._journal.write(json_util.dumps(doc, json_options=JOURNAL_JSON_OPTIONS) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+    # ===================== WRITER SIDE =====================
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._buffer and not await self._flush_or_log():
+                # Mongo unavailable; back off before retrying the same batch
+                await asyncio.sleep(min(1.0, self.flush_interval * 10))
+
+    async def _flush_or_log(self) -> bool:
+        """flush() that never raises, so one bad batch cannot stop the writer"""
+        try:
+            return await self.flush()
+        except Exception as exc:
+            self.failed_flushes += 1
+            logger.exception(f"Lead queue flush failed, keeping {len(self._buffer)} leads for retry: {exc}")
+            return False
+
+    async def flush(self) -> bool:
+        """Write buffered leads in batches; returns False if a batch had to be kept for retry"""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                self._writing = {doc['id'] for doc in batch}
+                try:
+                    written = await self._write(batch)
+                except BaseException:
+                    self._buffer[:0] = [doc for doc in batch if doc['id'] in self._pending]
+                    raise
+                finally:
+                    self._writing = set()
+                if not written:
+                    self._buffer[:0] = [doc for doc in batch if doc['id'] in self._pending]
+                    return False
+            if self._journal and not self._pending:
+                self._journal.seek(0)
+                self._journal.truncate()
+            return True
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            fatal = []
+            retry = []
+            for error in exc.details.get("writeErrors", []):
+                if is_dedupe_conflict(error) and self.on_conflict:
+                    try:
+                        await self.on_conflict(batch[error["index"]])
+                    except Exception as conflict_exc:
+                        logger.warning(f"Lead queue merge failed, retrying later: {conflict_exc}")
+                        retry.append(batch[error["index"]])
+                elif error.get("code") != DUPLICATE_KEY_ERROR:
+                    # Duplicate ids are leads that were already written before a replay
+                    fatal.append(error)
+            if fatal:
+                logger.error(f"Lead queue dropped {len(fatal)} leads: {fatal[0].get('errmsg')}")
+            if retry:
+                # Everything else in the batch is written; only the failed merges stay pending
+                retried = {doc['id'] for doc in retry}
+                self._written([doc for doc in batch if doc['id'] not in retried], started)
+                self.failed_flushes += 1
+                return False
+        except PyMongoError as exc:
+            self.failed_flushes += 1
+            logger.warning(f"Lead queue flush of {len(batch)} leads failed: {exc}")
+            return False
+        self._written(batch, started)
+        return True
+
+    def _written(self, batch: List[Dict[str, Any]], started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for doc in batch:
+            self._pending.pop(doc['id'], None)
+            key = doc.get('dedupe_key')
+            if key and self._pending_by_key.get(key) is doc:
+                del self._pending_by_key[key]
+        self.flushed += len(batch)
+        self.flush_count += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    # ===================== JOURNAL RECOVERY =====================
+    def _claim_orphaned_journals(self) -> List[Path]:
+        """Take over the journals of processes that are gone.
+
+        The rename is atomic, so when several workers start together each
+        orphan is claimed by exactly one of them. A claimed journal is named
+        `<stem>.<claimer>-<n><suffix>` until it has been re-journaled, so it is
+        claimable again if the claimer dies first. A journal at `journal_path`
+        itself predates per-process journals and has no owner.
+        """
+        stem, suffix = self.journal_path.stem, self.journal_path.suffix
+        me = self.journal_file.name[len(stem) + 1:len(self.journal_file.name) - len(suffix)]
+        claimed = []
+        for n, path in enumerate([self.journal_path, *sorted(self.journal_path.parent.glob(f"{stem}.*{suffix}"))]):
+            if path == self.journal_file or not path.exists():
+                continue
+            if path != self.journal_path:
+                owner = path.name[len(stem) + 1:len(path.name) - len(suffix)].split("-", 1)[0]
+                if owner == me:
+                    claimed.append(path)  # left by an earlier process with this pid
+                    continue
+                if _process_alive(owner):
+                    continue
+            claim = path.with_name(f"{stem}.{me}-{n}{suffix}")
+            try:
+                os.rename(path, claim)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            claimed.append(claim)
+        return claimed
+
+    def _adopt_journal(self, claim: Path) -> int:
+        """Replay a claimed journal into this queue, re-journaling its leads before deleting it"""
+        replayed = self._replay_journal(claim)
+        for doc in replayed:
+            self._journal_write(doc)
+        claim.unlink()
+        return len(replayed)
+
+    def _replay_journal(self, path: Path) -> List[Dict[str, Any]]:
+        """Buffer the leads journaled in `path`; returns every lead it added or updated"""
+        if not path.exists():
+            return []
+        replayed: Dict[str, Dict[str, Any]] = {}
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    doc = json_util.loads(line, json_options=JOURNAL_JSON_OPTIONS)
+                except ValueError:
+                    # Torn final write from a crash
+                    continue
+                queued = self._pending.get(doc['id'])
+                if queued is not None:
+                    # A later line for the same lead carries merged submissions; update in place
+                    queued.clear()
+                    queued.update(doc)
+                    doc = queued
+                else:
+                    self._buffer.append(doc)
+                    self._pending[doc['id']] = doc
+                    if doc.get('dedupe_key'):
+                        self._pending_by_key[doc['dedupe_key']] = doc
+                replayed[doc['id']] = doc
+        return list(replayed.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "flushes": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "rejected": self.rejected,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 3) if self.flush_count else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
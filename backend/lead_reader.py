@@ -0,0 +1,54 @@
+"""Lead Reader - lead pages read as raw BSON and rendered straight to JSON bytes"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from models import Lead, as_utc_datetime
+
+# Everything a lead listing returns; internal fields (_id, dedupe_key) never leave the database
+LEAD_FIELDS = (*Lead.model_fields, "notes", "submissions")
+LEAD_PROJECTION = {"_id": 0, **{field: 1 for field in LEAD_FIELDS}}
+
+# Rows stay as the server's BSON bytes until they are rendered
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument, tz_aware=True)
+DECODE_OPTIONS = CodecOptions(tz_aware=True)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return as_utc_datetime(value).isoformat()
+    return str(value)
+
+
+# Same output as FastAPI's JSONResponse, without the jsonable_encoder walk
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_json_default)
+
+
+def render_leads(rows: Sequence[RawBSONDocument]) -> bytes:
+    """JSON array of raw lead rows.
+
+    Each row's bytes are decoded by the C extension and encoded right away, so
+    a page never exists as a list of dicts. Dates render like serialize_doc:
+    ISO strings in UTC (rows not yet migrated keep their stored strings).
+    """
+    parts = [_encoder.encode(bson.decode(row.raw, DECODE_OPTIONS)) for row in rows]
+    return ("[" + ",".join(parts) + "]").encode("utf-8")
+
+
+class LeadReader:
+    """Keyset-ordered lead pages fetched with a fixed projection as RawBSONDocuments"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def _raw_collection(self):
+        return self.collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+
+    async def find(self, query: Dict[str, Any], sort: List[tuple], limit: int) -> List[RawBSONDocument]:
+        cursor = self._raw_collection().find(query, LEAD_PROJECTION).sort(sort).limit(limit)
+        return await cursor.to_list(length=limit)
@@ -0,0 +1,112 @@
+"""Lead Analytics - server-side aggregation of lead counts and the status funnel, cached briefly"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Tuple
+
+# Pipeline stages in order; `lost` can happen at any point and sits outside the funnel
+STATUS_FUNNEL = ("new", "contacted", "site_visit_scheduled", "quoted", "won")
+
+# Dimensions without a dedicated index are counted together in one $facet pass
+FACET_DIMENSIONS = ("lead_type", "city", "source")
+
+
+def _counts(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """{"_id": value, "count": n} rows -> {value: n}, largest first"""
+    ordered = sorted(rows, key=lambda row: row["count"], reverse=True)
+    return {str(row["_id"]) if row["_id"] is not None else "unknown": row["count"] for row in ordered}
+
+
+def build_funnel(by_status: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Leads that reached each stage: everything currently at that stage or beyond.
+
+    Every lead starts as `new`; lost leads count there only, since we do not
+    record how far they got before dropping out.
+    """
+    total = sum(by_status.values())
+    funnel = []
+    for position, stage in enumerate(STATUS_FUNNEL):
+        if position == 0:
+            reached = total
+        else:
+            reached = sum(by_status.get(later, 0) for later in STATUS_FUNNEL[position:])
+        funnel.append({
+            "stage": stage,
+            "count": reached,
+            "rate": round(reached / total, 4) if total else 0.0,
+        })
+    return funnel
+
+
+class LeadStats:
+    """Runs the lead aggregations and keeps each result for `ttl` seconds"""
+
+    def __init__(self, collection, ttl: float = 30.0):
+        self.collection = collection
+        self.ttl = ttl
+        self._cache: Dict[Hashable, Tuple[float, Dict[str, Any]]] = {}
+
+    async def _aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self.collection.aggregate(pipeline).to_list(length=None)
+
+    async def compute(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        prefix = [{"$match": match}] if match else []
+        # Over the whole collection the $sort is answered by the status index and,
+        # with only `status` projected, the count is a covered index scan. A
+        # created_at range is matched through its own index instead: sorting that
+        # on status would be a blocking in-memory sort. Rows are ordered in Python.
+        status_pipeline = prefix + ([] if match else [{"$sort": {"status": 1}}]) + [
+            {"$project": {"_id": 0, "status": 1}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]
+        day_pipeline = prefix + [
+            {"$match": {"created_at": {"$type": "date"}}},
+            {"$project": {"_id": 0, "created_at": 1}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}},
+        ]
+        # Leads not yet migrated to BSON dates (migrate_lead_dates.py) still hold ISO strings
+        legacy_day_pipeline = prefix + [
+            {"$match": {"created_at": {"$type": "string"}}},
+            {"$project": {"_id": 0, "created_at": 1}},
+            {"$group": {"_id": {"$substr": ["$created_at", 0, 10]}, "count": {"$sum": 1}}},
+        ]
+        facet_pipeline = prefix + [
+            {"$project": {"_id": 0, **{field: 1 for field in FACET_DIMENSIONS}}},
+            {"$facet": {
+                field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+                for field in FACET_DIMENSIONS
+            }},
+        ]
+        status_rows, day_rows, legacy_day_rows, facet_rows = await asyncio.gather(
+            self._aggregate(status_pipeline),
+            self._aggregate(day_pipeline),
+            self._aggregate(legacy_day_pipeline),
+            self._aggregate(facet_pipeline),
+        )
+        by_day: Dict[str, int] = {}
+        for row in day_rows + legacy_day_rows:
+            if row["_id"]:
+                by_day[row["_id"]] = by_day.get(row["_id"], 0) + row["count"]
+
+        by_status = _counts(status_rows)
+        facets = facet_rows[0] if facet_rows else {}
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            **{f"by_{field}": _counts(facets.get(field, [])) for field in FACET_DIMENSIONS},
+            "by_day": [{"day": day, "count": count} for day, count in sorted(by_day.items())],
+            "funnel": build_funnel(by_status),
+        }
+
+    async def get(self, key: Hashable, match: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached and now - cached[0] < self.ttl:
+            return cached[1]
+        result = await self.compute(match)
+        result["generated_at"] = datetime.now(timezone.utc).isoformat()
+        # Expired entries are dropped whenever a new one is stored
+        self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.ttl}
+        self._cache[key] = (now, result)
+        return result
@@ -0,0 +1,206 @@
+"""Request Metrics - per-route latency, size and MongoDB time, rendered in the Prometheus text format"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PREFIX = "krystal"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS: Tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Label value for requests that matched no route (404s, probes)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+        cumulative += self.counts[-1]
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class RouteMetrics:
+    """Every series for one route, bound once so the request path never builds labels"""
+
+    __slots__ = ("labels", "responses", "latency", "size", "db_time", "db_commands")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{method}",route="{route}"'
+        self.responses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.db_commands = 0
+
+    def record(self, status: int, seconds: float, size: int, db: Optional["DBTime"]) -> None:
+        self.responses[status] = self.responses.get(status, 0) + 1
+        self.latency.observe(seconds)
+        self.size.observe(size)
+        if db is not None and db.commands:
+            self.db_time.observe(db.seconds)
+            self.db_commands += db.commands
+
+
+class DBTime:
+    """MongoDB time spent on behalf of one request"""
+
+    __slots__ = ("seconds", "commands")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.commands = 0
+
+
+# Motor runs each operation in a copy of the caller's context, so the listener
+# (called on the executor thread) sees the accumulator of the request that issued it
+_current_db_time: ContextVar[Optional[DBTime]] = ContextVar("current_db_time", default=None)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo command listener: totals per command name plus the current request's DB time"""
+
+    def __init__(self):
+        self.commands: Dict[str, List[float]] = {}  # name -> [count, seconds, failures]
+
+    def _finish(self, event, failed: bool) -> None:
+        seconds = event.duration_micros / 1e6
+        totals = self.commands.get(event.command_name)
+        if totals is None:
+            totals = self.commands.setdefault(event.command_name, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += failed
+        request = _current_db_time.get()
+        if request is not None:
+            request.seconds += seconds
+            request.commands += 1
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, True)
+
+
+class MetricsRegistry:
+    """Route series keyed by endpoint function, plus the MongoDB command listener"""
+
+    def __init__(self):
+        self.routes: Dict[Callable[..., Any], RouteMetrics] = {}
+        self.unmatched = RouteMetrics("ANY", UNMATCHED_ROUTE)
+        self.command_listener = CommandMetrics()
+
+    def bind_routes(self, routes: Iterable[Any]) -> None:
+        """Create the series for every route up front (call once all routers are included)"""
+        for route in routes:
+            endpoint = getattr(route, "endpoint", None)
+            if endpoint is None or endpoint in self.routes:
+                continue
+            methods = sorted(getattr(route, "methods", None) or ()) or ["ANY"]
+            self.routes[endpoint] = RouteMetrics(methods[0], route.path)
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        route_series = [*self.routes.values(), self.unmatched]
+        lines = [
+            f"# HELP {PREFIX}_http_requests_total Requests handled, by route and status code",
+            f"# TYPE {PREFIX}_http_requests_total counter",
+        ]
+        for series in route_series:
+            for status, count in sorted(series.responses.items()):
+                lines.append(f'{PREFIX}_http_requests_total{{{series.labels},status="{status}"}} {count}')
+
+        for name, kind, help_text in (
+            ("http_request_duration_seconds", "latency", "Time from request start to the last body byte"),
+            ("http_response_size_bytes", "size", "Response body bytes as sent (after compression)"),
+            ("http_request_db_seconds", "db_time", "MongoDB command time per request that used the database"),
+        ):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for series in route_series:
+                histogram = getattr(series, kind)
+                if any(histogram.counts):
+                    lines.extend(histogram.samples(f"{PREFIX}_{name}", series.labels))
+
+        lines.append(f"# HELP {PREFIX}_http_request_db_commands_total MongoDB commands issued while handling requests")
+        lines.append(f"# TYPE {PREFIX}_http_request_db_commands_total counter")
+        for series in route_series:
+            if series.db_commands:
+                lines.append(f"{PREFIX}_http_request_db_commands_total{{{series.labels}}} {series.db_commands}")
+
+        commands = sorted(self.command_listener.commands.items())
+        lines.append(f"# HELP {PREFIX}_mongo_commands_total MongoDB commands by name, including background work")
+        lines.append(f"# TYPE {PREFIX}_mongo_commands_total counter")
+        lines.extend(f'{PREFIX}_mongo_commands_total{{command="{name}"}} {count}' for name, (count, _, _) in commands)
+        lines.append(f"# HELP {PREFIX}_mongo_command_seconds_total MongoDB command time by name")
+        lines.append(f"# TYPE {PREFIX}_mongo_command_seconds_total counter")
+        lines.extend(f'{PREFIX}_mongo_command_seconds_total{{command="{name}"}} {seconds:.6f}' for name, (_, seconds, _) in commands)
+        lines.append(f"# HELP {PREFIX}_mongo_command_failures_total Failed MongoDB commands by name")
+        lines.append(f"# TYPE {PREFIX}_mongo_command_failures_total counter")
+        lines.extend(f'{PREFIX}_mongo_command_failures_total{{command="{name}"}} {failures}' for name, (_, _, failures) in commands)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and records it against the route that handled it.
+
+    The router writes the matched endpoint into the shared scope, so the
+    route is looked up once the response has been sent; streamed bodies are
+    timed until their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        db = DBTime()
+        token = _current_db_time.set(db)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_db_time.reset(token)
+            series = self.registry.routes.get(scope.get("endpoint"), self.registry.unmatched)
+            series.record(status, time.perf_counter() - started, size, db)
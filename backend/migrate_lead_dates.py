@@ -0,0 +1,103 @@
+"""Lead Date Migration - rewrite ISO-string lead dates as native BSON dates.
+
+Leads written before dates were stored natively hold created_at/updated_at
+(and submissions[].created_at) as ISO strings. The API reads both forms, so
+this can run against a live database; each update is conditional on the old
+value, so a lead edited mid-run is simply picked up by the next run.
+
+    python migrate_lead_dates.py --dry-run
+    python migrate_lead_dates.py --batch-size 500
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from models import LEAD_DATE_FIELDS, as_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _converted(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """$set for every string date on the lead that parses; unparseable values are left alone"""
+    update: Dict[str, Any] = {}
+    for field in LEAD_DATE_FIELDS:
+        value = doc.get(field)
+        if isinstance(value, str) and as_utc_datetime(value) is not None:
+            update[field] = as_utc_datetime(value)
+    submissions = doc.get("submissions") or []
+    if any(isinstance(item.get("created_at"), str) for item in submissions):
+        update["submissions"] = [
+            {**item, "created_at": as_utc_datetime(item["created_at"]) or item["created_at"]}
+            if isinstance(item.get("created_at"), str) else item
+            for item in submissions
+        ]
+    return update
+
+
+async def migrate(collection, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> Dict[str, int]:
+    """Convert string dates in batches, walking _id so converted leads are never revisited"""
+    query = {"$or": [
+        *({field: {"$type": "string"}} for field in LEAD_DATE_FIELDS),
+        {"submissions.created_at": {"$type": "string"}},
+    ]}
+    projection = {field: 1 for field in (*LEAD_DATE_FIELDS, "submissions")}
+    totals = {"scanned": 0, "updated": 0, "unparseable": 0}
+    last_id: Optional[Any] = None
+    while True:
+        batch_query = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        docs = await collection.find(batch_query, projection).sort("_id", 1).limit(batch_size).to_list(length=None)
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+        operations = []
+        for doc in docs:
+            update = _converted(doc)
+            totals["unparseable"] += sum(
+                1 for field in LEAD_DATE_FIELDS
+                if isinstance(doc.get(field), str) and field not in update
+            )
+            if not update:
+                continue
+            # Only applies if nothing else rewrote these fields since the read
+            condition = {"_id": doc["_id"], **{field: doc.get(field) for field in update}}
+            operations.append(UpdateOne(condition, {"$set": update}))
+        totals["scanned"] += len(docs)
+        if operations and not dry_run:
+            result = await collection.bulk_write(operations, ordered=False)
+            totals["updated"] += result.modified_count
+        elif dry_run:
+            totals["updated"] += len(operations)
+        logger.info(f"Lead dates: {totals}")
+    return totals
+
+
+async def main(batch_size: int, dry_run: bool) -> None:
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    try:
+        db = client[os.environ.get('DB_NAME', 'krystal_db')]
+        totals = await migrate(db.leads, batch_size, dry_run)
+    finally:
+        client.close()
+    verb = "Would convert" if dry_run else "Converted"
+    print(f"{verb} {totals['updated']} of {totals['scanned']} leads ({totals['unparseable']} unparseable dates left as strings)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert ISO-string lead dates to BSON dates")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count the leads that would change without writing")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.batch_size, args.dry_run))
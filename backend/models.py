@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
+import re
 import uuid
 
 # Helper to generate IDs
@@ -10,7 +11,53 @@ def generate_id() -> str:
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
+# Lead dates are BSON dates; leads written before the migration hold ISO strings
+LEAD_DATE_FIELDS = ("created_at", "updated_at")
+
+def as_utc_datetime(value: Any) -> Optional[datetime]:
+    """A stored date in either form (datetime or ISO string) as an aware UTC datetime"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+# Phone normalization (the lead deduplication key)
+def normalize_phone(phone: str) -> str:
+    """Normalize Indian numbers to E.164 (+91XXXXXXXXXX); other numbers keep their digits"""
+    digits = re.sub(r"\D", "", phone)
+    if phone.strip().startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00") and len(digits) > 4:
+        return f"+{digits[2:]}"
+    if len(digits) == 10 and digits[0] in "6789":
+        return f"+91{digits}"
+    if len(digits) == 11 and digits.startswith("0"):
+        return f"+91{digits[1:]}"
+    if len(digits) == 12 and digits.startswith("91"):
+        return f"+{digits}"
+    return digits
+
 # Lead Models
+class QuoteOpening(BaseModel):
+    """One line of a window/door schedule; option ids refer to the design studio catalog"""
+    label: Optional[str] = None  # e.g. "Master bedroom"
+    product_type: str  # casement, sliding, tilt_turn, ...
+    category: str = "windows"  # windows, doors
+    width_mm: float = Field(gt=0, le=10000)
+    height_mm: float = Field(gt=0, le=10000)
+    quantity: int = Field(default=1, ge=1, le=1000)
+    profile_id: Optional[str] = None
+    glass_id: Optional[str] = None
+    color_id: Optional[str] = None
+    hardware_ids: List[str] = []
+
+class QuoteRequest(BaseModel):
+    openings: List[QuoteOpening] = Field(min_length=1, max_length=2000)
+
 class LeadCreate(BaseModel):
     name: str
     phone: str
@@ -22,6 +69,15 @@ class LeadCreate(BaseModel):
     preferences: Optional[str] = None
     message: Optional[str] = None
     source: Optional[str] = "website"
+    configuration: Optional[List[QuoteOpening]] = None  # design studio schedule to price
+
+    @field_validator("phone")
+    @classmethod
+    def _normalize_phone(cls, value: str) -> str:
+        normalized = normalize_phone(value)
+        if not normalized.lstrip("+"):
+            raise ValueError("phone must contain digits")
+        return normalized
 
 class Lead(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -36,7 +92,10 @@ class Lead(BaseModel):
     preferences: Optional[str] = None
     message: Optional[str] = None
     source: str = "website"
+    configuration: Optional[List[QuoteOpening]] = None
+    estimate: Optional[Dict[str, Any]] = None  # priced configuration at submission time
     status: str = "new"  # new, contacted, site_visit_scheduled, quoted, won, lost
+    submission_count: int = 1  # repeat submissions are merged into the open lead
     created_at: datetime = Field(default_factory=now_utc)
     updated_at: datetime = Field(default_factory=now_utc)
 
@@ -162,6 +221,7 @@ class ColorFinish(BaseModel):
     category: str  # laminate, wood_texture, solid
     image: str
     is_popular: bool = False
+    description: Optional[str] = None
 
 class GlassOption(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -170,6 +230,11 @@ class GlassOption(BaseModel):
     description: str
     benefits: List[str] = []
     image: str
+    thickness: Optional[str] = None
+    u_value: Optional[str] = None
+    light_transmission: Optional[str] = None
+    sound_reduction: Optional[str] = None
+    best_for: List[str] = []
 
 class Hardware(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -178,6 +243,64 @@ class Hardware(BaseModel):
     category: str  # handles, hinges, locks, accessories
     description: str
     image: str
+    brand: Optional[str] = None
+    features: List[str] = []
+    finishes: List[str] = []
+
+class ProfileSystem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=generate_id)
+    name: str
+    depth: str
+    chambers: int
+    u_value: str
+    sound_class: str
+    weather_rating: str
+    max_glass: str
+    steel_reinforcement: str
+    best_for: str
+    features: List[str] = []
+    popular: bool = False
+
+# Performance Models - numeric attributes parsed from the free-text specs; None when not stated
+class ProductPerformance(BaseModel):
+    slug: str
+    u_value: Optional[float] = None  # W/m²K, best achievable
+    sound_reduction_db: Optional[float] = None
+    frame_depth_mm: Optional[List[float]] = None  # [min, max]
+    max_width_mm: Optional[float] = None
+    max_height_mm: Optional[float] = None
+    max_glass_mm: Optional[float] = None
+    max_panel_weight_kg: Optional[float] = None
+
+class GlassPerformance(BaseModel):
+    id: str
+    u_value: Optional[float] = None  # W/m²K, best achievable
+    u_value_max: Optional[float] = None
+    light_transmission: Optional[float] = None  # fraction, midpoint of the stated range
+    sound_reduction_db: Optional[List[float]] = None  # [min, max]
+    min_thickness_mm: Optional[float] = None
+
+class ProfilePerformance(BaseModel):
+    id: str
+    depth_mm: Optional[float] = None
+    chambers: int
+    u_value: Optional[float] = None  # W/m²K
+    sound_reduction_db: Optional[List[float]] = None  # [min, max]
+    max_glass_mm: Optional[float] = None
+    wind_load_pa: Optional[float] = None
+    water_tightness_pa: Optional[float] = None
+
+class PerformanceFacade(BaseModel):
+    orientation: str  # N, NE, E, SE, S, SW, W, NW
+    area_sqft: float = Field(gt=0, le=100000)
+
+class PerformanceRequest(BaseModel):
+    city: str = "gurugram"
+    facades: List[PerformanceFacade] = Field(min_length=1, max_length=8)
+    profile_ids: Optional[List[str]] = None  # all profiles when omitted
+    glass_ids: Optional[List[str]] = None  # all glass options when omitted
+    tariff_per_kwh: Optional[float] = Field(default=None, gt=0)
 
 # Download/Resource Models
 class Download(BaseModel):
@@ -0,0 +1,51 @@
+"""Keyset Pagination - opaque cursors over (created_at, id) for newest-first listings"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at: Any, doc_id: str) -> str:
+    """Opaque token pointing just past the given row"""
+    if isinstance(created_at, datetime):
+        created_at = {"$date": created_at.isoformat()}
+    raw = json.dumps([created_at, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(created_at, dict):
+            created_at = datetime.fromisoformat(created_at["$date"])
+    except (ValueError, TypeError, KeyError, UnicodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if not isinstance(doc_id, str):
+        raise InvalidCursor("Invalid cursor")
+    return created_at, doc_id
+
+
+def keyset_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """Mongo filter selecting rows strictly after the cursor in (created_at desc, id desc) order"""
+    if not cursor:
+        return {}
+    created_at, doc_id = decode_cursor(cursor)
+    after = [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}},
+    ]
+    if isinstance(created_at, datetime):
+        # Dates sort above strings, and $lt only compares within a type: rows
+        # still holding ISO-string dates all come after every BSON date
+        after.append({"created_at": {"$type": "string"}})
+    return {"$or": after}
+
+
+# Sort order matching the compound indexes created at startup
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
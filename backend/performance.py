@@ -0,0 +1,165 @@
+"""Performance Simulator - annual heat gain, AC cost and acoustic rating for every profile x glass combination"""
+
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from specs import SpecIndex
+
+SQ_FT_PER_SQ_M = 10.7639
+
+# Share of a window's area taken by the frame
+FRAME_FRACTION = 0.2
+
+# Air conditioner coefficient of performance (heat removed per unit of electricity)
+AC_COP = 3.2
+
+# Solar heat gain coefficients; the specs only state light transmission
+GLASS_SHGC: Dict[str, float] = {
+    "glass-clear-float": 0.82,
+    "glass-tinted": 0.55,
+    "glass-reflective": 0.35,
+    "glass-frosted": 0.70,
+    "glass-toughened": 0.82,
+    "glass-self-cleaning": 0.80,
+    "glass-dgu-standard": 0.70,
+    "glass-laminated": 0.75,
+    "glass-dgu-argon": 0.70,
+    "glass-lowe": 0.42,
+    "glass-acoustic": 0.72,
+    "glass-triple": 0.50,
+}
+
+# Comparison point: single clear glass in a plain aluminium frame
+BASELINE = {"name": "Single clear glass, aluminium frame", "glass_u_value": 5.8, "frame_u_value": 5.9, "shgc": 0.82}
+
+# Cooling-season solar irradiance on a vertical window, kWh/m², for north India
+SOLAR_GAIN_BY_ORIENTATION: Dict[str, float] = {
+    "N": 230.0, "NE": 330.0, "E": 520.0, "SE": 560.0,
+    "S": 500.0, "SW": 620.0, "W": 650.0, "NW": 430.0,
+}
+
+# Cooling degree hours above 24°C and residential tariff (Rs/kWh) per service city
+CLIMATE_PROFILES: Dict[str, Dict[str, float]] = {
+    "gurugram": {"cooling_degree_hours": 35500.0, "solar_factor": 1.0, "tariff_per_kwh": 7.5},
+    "delhi": {"cooling_degree_hours": 36500.0, "solar_factor": 1.0, "tariff_per_kwh": 8.0},
+    "noida": {"cooling_degree_hours": 35000.0, "solar_factor": 0.98, "tariff_per_kwh": 7.0},
+    "faridabad": {"cooling_degree_hours": 36000.0, "solar_factor": 1.0, "tariff_per_kwh": 7.5},
+    "ghaziabad": {"cooling_degree_hours": 35000.0, "solar_factor": 0.98, "tariff_per_kwh": 7.0},
+}
+
+
+class SimulationError(ValueError):
+    """Unknown city, orientation, profile or glass option"""
+
+
+def _midpoint(low: Optional[float], high: Optional[float]) -> float:
+    return np.nan if low is None else (low + (high if high is not None else low)) / 2
+
+
+class PerformanceSimulator:
+    """Thermal and acoustic figures per profile x glass pair, evaluated as one (profiles, glass) grid.
+
+    Window U-value is the area-weighted frame and glass U-value; annual heat
+    gain is conduction over the city's cooling degree hours plus solar gain
+    through the glazed share for the given facade orientations.
+    """
+
+    def __init__(self, specs: SpecIndex):
+        self.profile_ids = tuple(specs.profiles)
+        self.glass_ids = tuple(specs.glass)
+        profiles = [specs.profiles[i] for i in self.profile_ids]
+        glass = [specs.glass[i] for i in self.glass_ids]
+        self.frame_u = np.array([np.nan if p.u_value is None else p.u_value for p in profiles])
+        self.glass_u = np.array([_midpoint(g.u_value, g.u_value_max) for g in glass])
+        self.shgc = np.array([
+            GLASS_SHGC.get(g.id, 0.9 * g.light_transmission if g.light_transmission else 0.7) for g in glass
+        ])
+        self.profile_sound = np.array([p.sound_reduction_db[1] if p.sound_reduction_db else np.nan for p in profiles])
+        self.glass_sound = np.array([g.sound_reduction_db[1] if g.sound_reduction_db else np.nan for g in glass])
+        self.profile_max_glass = np.array([np.inf if p.max_glass_mm is None else p.max_glass_mm for p in profiles])
+        self.glass_thickness = np.array([g.min_thickness_mm or 0.0 for g in glass])
+
+    def _select(self, ids: Optional[Sequence[str]], known: Sequence[str], kind: str) -> np.ndarray:
+        if not ids:
+            return np.arange(len(known))
+        positions = {option: i for i, option in enumerate(known)}
+        missing = [option for option in ids if option not in positions]
+        if missing:
+            raise SimulationError(f"Unknown {kind}: {', '.join(missing)}")
+        return np.array([positions[option] for option in ids], dtype=np.intp)
+
+    def simulate(
+        self,
+        city: str,
+        facades: Sequence[Mapping[str, Any]],
+        profile_ids: Optional[Sequence[str]] = None,
+        glass_ids: Optional[Sequence[str]] = None,
+        tariff_per_kwh: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Annual figures for every requested profile x glass pair, best savings first"""
+        climate = CLIMATE_PROFILES.get(city.lower())
+        if climate is None:
+            raise SimulationError(f"No climate profile for city: {city}")
+        unknown = [f['orientation'] for f in facades if f['orientation'].upper() not in SOLAR_GAIN_BY_ORIENTATION]
+        if unknown:
+            raise SimulationError(f"Unknown orientation: {', '.join(unknown)}")
+        tariff = tariff_per_kwh or climate['tariff_per_kwh']
+
+        area_sqft = np.array([f['area_sqft'] for f in facades], dtype=np.float64)
+        irradiance = np.array([SOLAR_GAIN_BY_ORIENTATION[f['orientation'].upper()] for f in facades])
+        area = area_sqft.sum() / SQ_FT_PER_SQ_M
+        solar_per_m2 = float((area_sqft * irradiance).sum() / area_sqft.sum()) * climate['solar_factor']
+        degree_hours = climate['cooling_degree_hours']
+
+        def annual_heat_gain(frame_u, glass_u, shgc):
+            window_u = FRAME_FRACTION * frame_u + (1 - FRAME_FRACTION) * glass_u
+            conduction = window_u * area * degree_hours / 1000
+            solar = (1 - FRAME_FRACTION) * shgc * area * solar_per_m2
+            return window_u, conduction + solar
+
+        profiles = self._select(profile_ids, self.profile_ids, "profile")
+        glass = self._select(glass_ids, self.glass_ids, "glass option")
+        # (profiles, 1) against (1, glass) broadcasts every pair in one pass
+        frame_u = self.frame_u[profiles][:, None]
+        window_u, heat_gain = annual_heat_gain(frame_u, self.glass_u[glass][None, :], self.shgc[glass][None, :])
+        ac_kwh = heat_gain / AC_COP
+        ac_cost = ac_kwh * tariff
+
+        _, baseline_gain = annual_heat_gain(BASELINE['frame_u_value'], BASELINE['glass_u_value'], BASELINE['shgc'])
+        baseline_kwh = baseline_gain / AC_COP
+        baseline_cost = baseline_kwh * tariff
+        sound = np.fmin(self.profile_sound[profiles][:, None], self.glass_sound[glass][None, :])
+        fits = self.glass_thickness[glass][None, :] <= self.profile_max_glass[profiles][:, None]
+
+        order = np.argsort(ac_cost, axis=None, kind="stable")
+        rows, cols = np.unravel_index(order, ac_cost.shape)
+        results = [
+            {
+                "profile_id": self.profile_ids[profiles[r]],
+                "glass_id": self.glass_ids[glass[c]],
+                "compatible": bool(fits[r, c]),
+                "u_value": round(float(window_u[r, c]), 3),
+                "shgc": round(float(self.shgc[glass[c]]), 3),
+                "heat_gain_kwh": round(float(heat_gain[r, c]), 1),
+                "ac_kwh": round(float(ac_kwh[r, c]), 1),
+                "ac_cost": round(float(ac_cost[r, c])),
+                "savings_kwh": round(float(baseline_kwh - ac_kwh[r, c]), 1),
+                "savings_cost": round(float(baseline_cost - ac_cost[r, c])),
+                "savings_pct": round(float((baseline_cost - ac_cost[r, c]) / baseline_cost * 100), 1),
+                "sound_reduction_db": None if np.isnan(sound[r, c]) else float(sound[r, c]),
+            }
+            for r, c in zip(rows.tolist(), cols.tolist())
+        ]
+        return {
+            "city": city.lower(),
+            "climate": {**climate, "tariff_per_kwh": tariff},
+            "window_area_sqft": round(float(area_sqft.sum()), 2),
+            "baseline": {
+                "name": BASELINE['name'],
+                "heat_gain_kwh": round(float(baseline_gain), 1),
+                "ac_kwh": round(float(baseline_kwh), 1),
+                "ac_cost": round(float(baseline_cost)),
+            },
+            "results": results,
+        }
@@ -0,0 +1,207 @@
+"""Quote Pricing - itemized estimates for a schedule of window/door openings, priced in one vectorized pass"""
+
+import logging
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from catalog import DesignStudioIndex
+
+logger = logging.getLogger(__name__)
+
+SQ_MM_PER_SQ_FT = 92903.04
+
+# Frame cost per sq ft of opening, by profile system (standard hardware included)
+PROFILE_RATES: Dict[str, float] = {
+    "profile-60mm": 260.0,
+    "profile-70mm": 320.0,
+    "profile-82mm": 400.0,
+}
+
+# Frame complexity relative to a casement window of the same size
+PRODUCT_TYPE_FACTORS: Dict[str, float] = {
+    "fixed": 0.85,
+    "casement": 1.0,
+    "top_hung": 1.0,
+    "sliding": 0.9,
+    "french": 1.1,
+    "tilt_turn": 1.2,
+    "bifold": 1.35,
+    "lift_slide": 1.45,
+}
+CATEGORY_FACTORS: Dict[str, float] = {"windows": 1.0, "doors": 1.1}
+
+# Glass cost per sq ft of glazed area
+GLASS_RATES: Dict[str, float] = {
+    "glass-clear-float": 70.0,
+    "glass-tinted": 95.0,
+    "glass-reflective": 120.0,
+    "glass-frosted": 90.0,
+    "glass-toughened": 130.0,
+    "glass-self-cleaning": 160.0,
+    "glass-dgu-standard": 170.0,
+    "glass-laminated": 190.0,
+    "glass-dgu-argon": 200.0,
+    "glass-lowe": 240.0,
+    "glass-acoustic": 260.0,
+    "glass-triple": 340.0,
+}
+
+# Finish surcharge on the frame, by color category
+FINISH_FACTORS: Dict[str, float] = {
+    "solid": 1.0,
+    "wood_texture": 1.18,
+    "metallic": 1.22,
+    "dual_color": 1.28,
+}
+
+# Optional hardware upgrades, per unit (one set per opening)
+HARDWARE_PRICES: Dict[str, float] = {
+    "hw-hoppe-secustic": 2200.0,
+    "hw-roto-swing": 1800.0,
+    "hw-siegenia-favorit": 2400.0,
+    "hw-gu-multilock": 4500.0,
+    "hw-roto-safe": 5200.0,
+    "hw-yale-cylinder": 3200.0,
+    "hw-roto-nt-hinge": 2600.0,
+    "hw-friction-stay": 650.0,
+    "hw-child-restrictor": 450.0,
+    "hw-tandem-roller": 1400.0,
+    "hw-lift-slide-gear": 18000.0,
+    "hw-mesh-fiberglass": 1800.0,
+    "hw-mesh-ss": 3500.0,
+    "hw-mesh-pleated": 4200.0,
+    "hw-trickle-vent": 900.0,
+}
+
+GLAZED_FRACTION = 0.8  # share of an opening's area that is glass
+INSTALLATION_RATE = 55.0  # per sq ft
+MIN_CHARGEABLE_SQ_FT = 8.0  # small openings are billed as this size
+GST_RATE = 0.18
+
+DEFAULT_PROFILE = "profile-70mm"
+DEFAULT_GLASS = "glass-dgu-standard"
+DEFAULT_COLOR = "color-brilliant-white"
+
+LINE_COMPONENTS = ("frame", "glass", "finish", "hardware", "installation")
+
+
+class PricingError(ValueError):
+    """An opening references an option or product type that has no price"""
+
+
+def _rate_table(ids: Sequence[str], rates: Mapping[str, float], kind: str) -> Tuple[Dict[str, int], np.ndarray]:
+    """Position of every priced option id plus its rate at that position.
+
+    Options without a rate are left out: a new catalog option must not stop
+    the app from starting, only quotes that use it fail (see _positions).
+    """
+    priced = [option_id for option_id in ids if option_id in rates]
+    if len(priced) < len(ids):
+        missing = [option_id for option_id in ids if option_id not in rates]
+        logger.warning(f"No {kind} price for: {', '.join(missing)}; quotes using them are refused")
+    return {option_id: position for position, option_id in enumerate(priced)}, np.array([rates[i] for i in priced])
+
+
+def _positions(index: Dict[str, int], values: Sequence[str], kind: str) -> np.ndarray:
+    try:
+        return np.fromiter((index[value] for value in values), dtype=np.intp, count=len(values))
+    except KeyError as exc:
+        raise PricingError(f"Unknown or unpriced {kind}: {exc.args[0]}") from None
+
+
+class PricingEngine:
+    """Rate tables compiled into arrays aligned with the design studio options.
+
+    `estimate` turns each column of the opening schedule into an index array
+    once, so pricing hundreds of openings is a few array operations.
+    """
+
+    def __init__(self, design_studio: DesignStudioIndex):
+        self.profile_index, self.profile_rates = _rate_table(
+            [p.id for p in design_studio.profiles], PROFILE_RATES, "profile")
+        self.glass_index, self.glass_rates = _rate_table(
+            [g.id for g in design_studio.glass], GLASS_RATES, "glass")
+        self.hardware_index, self.hardware_prices = _rate_table(
+            [h.id for h in design_studio.hardware], HARDWARE_PRICES, "hardware")
+        self.color_index, self.finish_factors = _rate_table(
+            [c.id for c in design_studio.colors],
+            {c.id: FINISH_FACTORS[c.category] for c in design_studio.colors if c.category in FINISH_FACTORS},
+            "finish")
+        self.type_index, self.type_factors = _rate_table(list(PRODUCT_TYPE_FACTORS), PRODUCT_TYPE_FACTORS, "product type")
+        self.category_index, self.category_factors = _rate_table(list(CATEGORY_FACTORS), CATEGORY_FACTORS, "category")
+
+    def estimate(self, openings: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Itemized estimate for a list of openings (QuoteOpening dumps)"""
+        count = len(openings)
+        if not count:
+            raise PricingError("At least one opening is required")
+
+        width = np.fromiter((o['width_mm'] for o in openings), dtype=np.float64, count=count)
+        height = np.fromiter((o['height_mm'] for o in openings), dtype=np.float64, count=count)
+        quantity = np.fromiter((o.get('quantity', 1) for o in openings), dtype=np.float64, count=count)
+        profile = _positions(self.profile_index, [o.get('profile_id') or DEFAULT_PROFILE for o in openings], "profile")
+        glass = _positions(self.glass_index, [o.get('glass_id') or DEFAULT_GLASS for o in openings], "glass option")
+        color = _positions(self.color_index, [o.get('color_id') or DEFAULT_COLOR for o in openings], "color finish")
+        product_type = _positions(self.type_index, [o['product_type'] for o in openings], "product type")
+        category = _positions(self.category_index, [o.get('category') or "windows" for o in openings], "category")
+
+        # Hardware lists vary in length; flatten to (opening, item) pairs and sum per opening
+        hardware_rows = [(row, item) for row, o in enumerate(openings) for item in o.get('hardware_ids') or ()]
+        hardware = np.zeros(count)
+        if hardware_rows:
+            rows = np.fromiter((row for row, _ in hardware_rows), dtype=np.intp, count=len(hardware_rows))
+            items = _positions(self.hardware_index, [item for _, item in hardware_rows], "hardware")
+            hardware = np.bincount(rows, weights=self.hardware_prices[items], minlength=count)
+
+        area = width * height / SQ_MM_PER_SQ_FT
+        chargeable = np.maximum(area, MIN_CHARGEABLE_SQ_FT)
+        frame = chargeable * self.profile_rates[profile] * self.type_factors[product_type] * self.category_factors[category]
+        components = {
+            "frame": frame,
+            "glass": chargeable * GLAZED_FRACTION * self.glass_rates[glass],
+            "finish": frame * (self.finish_factors[color] - 1.0),
+            "hardware": hardware,
+            "installation": chargeable * INSTALLATION_RATE,
+        }
+        unit_price = np.round(sum(components.values()))
+        amount = unit_price * quantity
+
+        columns = {name: np.round(values).tolist() for name, values in components.items()}
+        area_list = np.round(area, 2).tolist()
+        chargeable_list = np.round(chargeable, 2).tolist()
+        unit_list = unit_price.tolist()
+        amount_list = amount.tolist()
+        lines: List[Dict[str, Any]] = []
+        for row, opening in enumerate(openings):
+            lines.append({
+                "label": opening.get('label'),
+                "product_type": opening['product_type'],
+                "category": opening.get('category') or "windows",
+                "width_mm": opening['width_mm'],
+                "height_mm": opening['height_mm'],
+                "quantity": opening.get('quantity', 1),
+                "area_sqft": area_list[row],
+                "chargeable_sqft": chargeable_list[row],
+                **{name: columns[name][row] for name in LINE_COMPONENTS},
+                "unit_price": unit_list[row],
+                "amount": amount_list[row],
+            })
+
+        subtotal = float(amount.sum())
+        total_area = float((chargeable * quantity).sum())
+        gst = round(subtotal * GST_RATE)
+        return {
+            "currency": "INR",
+            "lines": lines,
+            "summary": {
+                "openings": int(quantity.sum()),
+                "area_sqft": round(total_area, 2),
+                **{name: float(np.round((values * quantity).sum())) for name, values in components.items()},
+                "subtotal": subtotal,
+                "gst_rate": GST_RATE,
+                "gst": float(gst),
+                "total": subtotal + gst,
+                "rate_per_sqft": round(subtotal / total_area, 2),
+            },
+        }
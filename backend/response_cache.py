@@ -0,0 +1,152 @@
+"""Response Cache - pre-serialized JSON bodies for the read-only catalog endpoints"""
+
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from compression import MIN_COMPRESS_SIZE, SUPPORTED_ENCODINGS, compress, encoded_etag, request_encoding
+from http_cache import compute_etag
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the few non-JSON types that show up in model dumps"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def render_json(payload: Any) -> bytes:
+    """Serialize a payload exactly like FastAPI's JSONResponse does"""
+    return json.dumps(
+        payload,
+        default=_json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class CachedResponse:
+    """Final response bytes for one endpoint + query combination.
+
+    Compressed variants are produced on first request for each encoding, at
+    the fast per-request levels, and kept with the raw bytes, so a payload is
+    compressed once per catalog version. compress_best() replaces them with
+    maximum-level variants outside request handling (startup warm-up).
+    """
+
+    __slots__ = ("body", "etag", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = compute_etag(body)
+        self._variants: Dict[str, Tuple[bytes, str]] = {}
+
+    def variant(self, coding: Optional[str]) -> Tuple[bytes, str, Optional[str]]:
+        """(body, etag, content-coding) to send to a client that negotiated `coding`"""
+        if coding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, self.etag, None
+        encoded = self._variants.get(coding)
+        if encoded is None:
+            encoded = self._variants[coding] = (compress(self.body, coding), encoded_etag(self.etag, coding))
+        return encoded[0], encoded[1], coding
+
+    def compress_best(self) -> None:
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            for coding in SUPPORTED_ENCODINGS:
+                self._variants[coding] = (compress(self.body, coding, best=True), encoded_etag(self.etag, coding))
+
+
+class CachedJSONResponse(Response):
+    """Serves a CachedResponse, picking the stored variant for the request's Accept-Encoding"""
+
+    media_type = "application/json"
+
+    def __init__(self, entry: CachedResponse):
+        self.entry = entry
+        super().__init__(content=entry.body, headers={"ETag": entry.etag, "Vary": "Accept-Encoding"})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body, etag, coding = self.entry.variant(request_encoding(scope))
+        if coding:
+            self.body = body
+            self.init_headers({"ETag": etag, "Vary": "Accept-Encoding", "Content-Encoding": coding})
+        await super().__call__(scope, receive, send)
+
+
+class ETagJSONResponse(Response):
+    """JSON rendered per request with an ETag over its bytes.
+
+    For catalog-derived results too varied to keep in the ResponseCache
+    (search, compatibility): clients still revalidate them to a 304.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any):
+        super().__init__(content=content)
+        self.headers["ETag"] = compute_etag(self.body)
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+class ResponseCache:
+    """Lazily filled map of (endpoint, params) -> rendered JSON bytes.
+
+    Entries are tied to a catalog version; the first lookup with a new version
+    drops everything that was rendered from the previous data. Past
+    `max_entries` the least recently used entry is evicted, so arbitrary
+    query combinations cannot push out the hot defaults.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._version: Optional[Hashable] = None
+        self._entries: "OrderedDict[Tuple[str, Hashable], CachedResponse]" = OrderedDict()
+
+    def get_or_build(
+        self,
+        version: Hashable,
+        endpoint: str,
+        params: Hashable,
+        build: Callable[[], Any],
+    ) -> CachedResponse:
+        if version != self._version:
+            self._entries = OrderedDict()
+            self._version = version
+
+        key = (endpoint, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = CachedResponse(render_json(build()))
+            if len(self._entries) >= self.max_entries:
+                # Arbitrary query strings must not grow the cache without bound
+                self._entries.popitem(last=False)
+            self._entries[key] = entry
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    def compress_best(self) -> int:
+        """Recompress every cached entry at maximum levels; returns the number of entries.
+
+        Slow (brotli 11): call it when the cache is warmed, never per request.
+        """
+        for entry in self._entries.values():
+            entry.compress_best()
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries = OrderedDict()
+        self._version = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,331 @@
+"""Site Search - in-process BM25 inverted index over products, blog posts, FAQs and projects"""
+
+import hashlib
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from catalog import CatalogIndex
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Score multipliers for terms that only matched approximately
+PREFIX_MATCH_WEIGHT = 0.8
+FUZZY_MATCH_WEIGHT = 0.6
+
+# Upper bound on vocabulary terms a single prefix may expand to
+MAX_PREFIX_EXPANSIONS = 40
+
+# Words this short are only ever matched exactly
+MIN_FUZZY_LENGTH = 4
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its of on or our "
+    "so than that the their them there they this to was we what when where which while who "
+    "why will with you your".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Light English suffix stripping: windows -> window, glazing -> glaz, glazed -> glaz"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    if word.endswith("es") and word[-3:-2] in ("s", "x", "z") or word.endswith(("ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, accent-folded word tokens without stopwords"""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return [token for token in _TOKEN_RE.findall(folded) if token not in STOPWORDS]
+
+
+def _deletions(term: str) -> Iterator[str]:
+    """Every string one deletion away from `term` (SymSpell-style typo index keys)"""
+    for position in range(len(term)):
+        yield term[:position] + term[position + 1:]
+
+
+class SearchDocument:
+    """Display fields of one indexed item plus the weighted text it was indexed from"""
+
+    __slots__ = ("key", "type", "id", "slug", "title", "summary", "url", "fields", "fingerprint")
+
+    def __init__(self, type: str, id: str, slug: Optional[str], title: str, summary: str, url: str,
+                 fields: Iterable[Tuple[str, float]]):
+        self.key = f"{type}:{id}"
+        self.type = type
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.summary = summary
+        self.url = url
+        self.fields = tuple(fields)
+        self.fingerprint = hashlib.blake2b(
+            repr((title, summary, url, self.fields)).encode("utf-8"), digest_size=16
+        ).digest()
+
+    def as_result(self, score: float) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "id": self.id,
+            "slug": self.slug,
+            "title": self.title,
+            "summary": self.summary,
+            "url": self.url,
+            "score": round(score, 4),
+        }
+
+
+def catalog_documents(catalog: CatalogIndex) -> Iterator[SearchDocument]:
+    """Searchable documents for every product, blog post, FAQ and project"""
+    for p in catalog.products:
+        yield SearchDocument(
+            "product", p.id, p.slug, p.name, p.short_description, f"/products/{p.slug}",
+            [(p.name, 3.0), (p.product_type.replace("_", " "), 2.0), (p.short_description, 2.0),
+             (p.description, 1.0), (" ".join(p.features + p.benefits + p.use_cases), 1.0),
+             (" ".join(f"{s.label} {s.value}" for s in p.specs), 0.5)],
+        )
+    for post in catalog.blog_posts:
+        if not post.is_published:
+            continue
+        yield SearchDocument(
+            "blog", post.id, post.slug, post.title, post.excerpt, f"/blog/{post.slug}",
+            [(post.title, 3.0), (" ".join(post.tags), 2.0), (post.excerpt, 2.0), (post.content, 1.0)],
+        )
+    for faq in catalog.faqs:
+        yield SearchDocument(
+            "faq", faq.id, None, faq.question, faq.answer, f"/faqs#{faq.id}",
+            [(faq.question, 3.0), (faq.answer, 1.0)],
+        )
+    for project in catalog.projects:
+        yield SearchDocument(
+            "project", project.id, project.slug, project.title, project.location, f"/projects/{project.slug}",
+            [(project.title, 3.0), (f"{project.location} {project.project_type}", 2.0),
+             (" ".join([project.challenge, project.solution, project.outcome]), 1.0)],
+        )
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking, prefix expansion and single-edit typo tolerance.
+
+    Documents can be added and removed one at a time; `sync` applies the
+    difference between the indexed documents and a new catalog. Each document
+    occupies an integer slot, and a term's postings are packed into numpy
+    arrays of (slot, weighted tf) the first time a query touches the term
+    after it changed, so scoring is a handful of vector operations per term.
+    """
+
+    def __init__(self):
+        self.documents: Dict[str, SearchDocument] = {}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.total_length = 0.0
+        self._slots: Dict[str, int] = {}
+        self._slot_docs: List[Optional[SearchDocument]] = []
+        self._slot_lengths: List[float] = []
+        self._free_slots: List[int] = []
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._packed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._norms: Optional[np.ndarray] = None
+        self._types: Optional[np.ndarray] = None
+        self._vocabulary: Optional[List[str]] = None
+        self._deletion_index: Optional[Dict[str, Set[str]]] = None
+
+    # ===================== MAINTENANCE =====================
+    def add(self, doc: SearchDocument) -> None:
+        if doc.key in self.documents:
+            self.remove(doc.key)
+        frequencies: Dict[str, float] = {}
+        for text, weight in doc.fields:
+            for token in tokenize(text):
+                term = stem(token)
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        length = sum(frequencies.values())
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_docs[slot] = doc
+            self._slot_lengths[slot] = length
+        else:
+            slot = len(self._slot_docs)
+            self._slot_docs.append(doc)
+            self._slot_lengths.append(length)
+        for term, frequency in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self._invalidate_vocabulary()
+            postings[slot] = frequency
+            self._packed.pop(term, None)
+        self.documents[doc.key] = doc
+        self._slots[doc.key] = slot
+        self.total_length += length
+        self._doc_terms[doc.key] = tuple(frequencies)
+        self._norms = None
+        self._types = None
+
+    def remove(self, key: str) -> None:
+        if key not in self.documents:
+            return
+        slot = self._slots.pop(key)
+        for term in self._doc_terms.pop(key):
+            postings = self.postings[term]
+            postings.pop(slot, None)
+            self._packed.pop(term, None)
+            if not postings:
+                del self.postings[term]
+                self._invalidate_vocabulary()
+        self.total_length -= self._slot_lengths[slot]
+        self._slot_docs[slot] = None
+        self._slot_lengths[slot] = 0.0
+        self._free_slots.append(slot)
+        del self.documents[key]
+        self._norms = None
+        self._types = None
+
+    def sync(self, documents: Iterable[SearchDocument]) -> Tuple[int, int]:
+        """Bring the index in line with `documents`; returns (upserted, removed)"""
+        incoming = {doc.key: doc for doc in documents}
+        removed = [key for key in self.documents if key not in incoming]
+        for key in removed:
+            self.remove(key)
+        upserted = 0
+        for key, doc in incoming.items():
+            current = self.documents.get(key)
+            if current is None or current.fingerprint != doc.fingerprint:
+                self.add(doc)
+                upserted += 1
+        return upserted, len(removed)
+
+    def _invalidate_vocabulary(self) -> None:
+        self._vocabulary = None
+        self._deletion_index = None
+
+    @property
+    def vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    @property
+    def deletion_index(self) -> Dict[str, Set[str]]:
+        if self._deletion_index is None:
+            index: Dict[str, Set[str]] = {}
+            for term in self.postings:
+                if len(term) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletions(term):
+                        index.setdefault(variant, set()).add(term)
+            self._deletion_index = index
+        return self._deletion_index
+
+    def _packed_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        packed = self._packed.get(term)
+        if packed is None:
+            postings = self.postings[term]
+            packed = self._packed[term] = (
+                np.fromiter(postings.keys(), dtype=np.int32, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return packed
+
+    def _length_norms(self) -> np.ndarray:
+        """BM25 length normalisation K1 * (1 - B + B * len / avg_len) per slot"""
+        if self._norms is None:
+            lengths = np.asarray(self._slot_lengths, dtype=np.float64)
+            avg_length = self.total_length / len(self.documents)
+            self._norms = K1 * (1 - B + B * lengths / avg_length)
+        return self._norms
+
+    def _slot_types(self) -> np.ndarray:
+        if self._types is None:
+            self._types = np.array([doc.type if doc else "" for doc in self._slot_docs], dtype=object)
+        return self._types
+
+    # ===================== QUERYING =====================
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        vocabulary = self.vocabulary
+        start = bisect_left(vocabulary, prefix)
+        terms = []
+        for term in vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _fuzzy_terms(self, term: str) -> Set[str]:
+        """Vocabulary terms within one insertion, deletion or substitution of `term`"""
+        index = self.deletion_index
+        matches: Set[str] = set()
+        if term in index:
+            matches |= index[term]  # one letter missing from the query
+        for variant in _deletions(term):
+            if variant in self.postings:
+                matches.add(variant)  # one extra letter in the query
+            matches |= index.get(variant, set())  # substitution or transposition-by-one
+        matches.discard(term)
+        return matches
+
+    def expand(self, token: str, is_last: bool) -> Dict[str, float]:
+        """Vocabulary terms (with weights) that a query token should match"""
+        term = stem(token)
+        expansions: Dict[str, float] = {}
+        if term in self.postings:
+            expansions[term] = 1.0
+        if is_last:
+            # Autocomplete: the last token may be a partially typed word, either
+            # a prefix of an indexed stem or running past one ("glazi" -> "glaz")
+            for candidate in self._prefix_terms(token):
+                expansions.setdefault(candidate, PREFIX_MATCH_WEIGHT)
+            for cut in range(1, 4):
+                candidate = token[:-cut]
+                if len(candidate) >= MIN_FUZZY_LENGTH and candidate in self.postings:
+                    expansions.setdefault(candidate, PREFIX_MATCH_WEIGHT)
+        if not expansions and len(term) >= MIN_FUZZY_LENGTH:
+            for candidate in self._fuzzy_terms(term):
+                expansions.setdefault(candidate, FUZZY_MATCH_WEIGHT)
+        return expansions
+
+    def search(self, query: str, limit: int = 10, types: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        tokens = tokenize(query)
+        if not tokens or not self.documents:
+            return []
+        total_docs = len(self.documents)
+        norms = self._length_norms()
+        scores = np.zeros(len(self._slot_docs))
+        for position, token in enumerate(tokens):
+            # A document scores once per query token, through its best-matching term
+            token_scores = np.zeros(len(self._slot_docs))
+            for term, weight in self.expand(token, position == len(tokens) - 1).items():
+                slots, tf = self._packed_postings(term)
+                idf = math.log(1 + (total_docs - len(slots) + 0.5) / (len(slots) + 0.5)) * weight
+                # Slots are unique within one term's postings, so fancy indexing is safe
+                token_scores[slots] = np.maximum(token_scores[slots], idf * tf * (K1 + 1) / (tf + norms[slots]))
+            scores += token_scores
+
+        if types:
+            scores[~np.isin(self._slot_types(), list(types))] = 0.0
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(scores[matched], -limit)[-limit:]]
+        best = sorted(matched.tolist(), key=lambda slot: (-scores[slot], self._slot_docs[slot].key))
+        return [self._slot_docs[slot].as_result(float(scores[slot])) for slot in best]
+
+    def __len__(self) -> int:
+        return len(self.documents)
@@ -0,0 +1,254 @@
+"""Seed Snapshot - the validated seed catalog stored once as JSON and rehydrated with model_construct.
+
+Importing seed_data and design_studio_data validates every item through
+pydantic. The snapshot stores the validated items as plain data, keyed by a
+fingerprint of the source files, so later boots skip both the data modules
+and validation. It is only written by the build command (a deploy step); a
+missing or stale snapshot makes the app fall back to the sources. The file is
+plain JSON, so loading it never executes code.
+
+    python seed_snapshot.py build                  # write the snapshot (deploy step)
+    python seed_snapshot.py check --budget-ms 500  # fail if `import server` is over budget
+"""
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Type, Union, get_args
+
+import pydantic
+from pydantic import BaseModel
+
+from models import (
+    Product, Project, BlogPost, FAQ, Testimonial, City,
+    ColorFinish, GlassOption, Hardware, ProfileSystem, Download, GlobalSettings
+)
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+SNAPSHOT_PATH = Path(os.environ.get('SEED_SNAPSHOT_PATH', str(ROOT_DIR / 'seed_snapshot.json')))
+SNAPSHOT_ENABLED = os.environ.get('SEED_SNAPSHOT', 'true').lower() == 'true'
+
+# A change to any of these makes the snapshot stale
+SOURCE_FILES = ("seed_data.py", "design_studio_data.py", "models.py")
+
+# Section -> model; settings is a single item, everything else a list
+SECTIONS: Dict[str, Type[BaseModel]] = {
+    "products": Product,
+    "projects": Project,
+    "blog_posts": BlogPost,
+    "faqs": FAQ,
+    "testimonials": Testimonial,
+    "cities": City,
+    "colors": ColorFinish,
+    "glass": GlassOption,
+    "hardware": Hardware,
+    "profiles": ProfileSystem,
+    "downloads": Download,
+    "settings": GlobalSettings,
+}
+
+# App modules; in an import-time profile everything else counts as a dependency
+APP_MODULES = frozenset(path.stem for path in ROOT_DIR.glob("*.py"))
+DEFAULT_IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '500'))
+
+SeedContent = Dict[str, Any]
+
+
+def source_fingerprint() -> str:
+    digest = hashlib.blake2b(pydantic.VERSION.encode(), digest_size=16)
+    for name in SOURCE_FILES:
+        digest.update((ROOT_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def load_from_source() -> SeedContent:
+    """Import and validate the seed modules"""
+    from seed_data import ALL_PRODUCTS, PROJECTS, BLOG_POSTS, FAQS, TESTIMONIALS, CITIES, DOWNLOADS, GLOBAL_SETTINGS
+    from design_studio_data import (
+        COLOR_FINISHES_COMPREHENSIVE, GLASS_OPTIONS_COMPREHENSIVE, HARDWARE_COMPREHENSIVE, PROFILE_SYSTEMS,
+    )
+
+    return {
+        "products": list(ALL_PRODUCTS),
+        "projects": list(PROJECTS),
+        "blog_posts": list(BLOG_POSTS),
+        "faqs": list(FAQS),
+        "testimonials": list(TESTIMONIALS),
+        "cities": list(CITIES),
+        "colors": list(COLOR_FINISHES_COMPREHENSIVE),
+        "glass": list(GLASS_OPTIONS_COMPREHENSIVE),
+        "hardware": list(HARDWARE_COMPREHENSIVE),
+        "profiles": [ProfileSystem(**profile) for profile in PROFILE_SYSTEMS],
+        "downloads": list(DOWNLOADS),
+        "settings": GLOBAL_SETTINGS,
+    }
+
+
+def _model_in(annotation: Any) -> Optional[Type[BaseModel]]:
+    """The model inside an annotation such as ProductSpec, List[ProductSpec] or Optional[ContactInfo]"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        model = _model_in(arg)
+        if model is not None:
+            return model
+    return None
+
+
+@lru_cache(maxsize=None)
+def _nested_fields(model: Type[BaseModel]) -> Dict[str, Type[BaseModel]]:
+    nested = {}
+    for name, field in model.model_fields.items():
+        inner = _model_in(field.annotation)
+        if inner is not None:
+            nested[name] = inner
+    return nested
+
+
+def construct(model: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    """model_construct that also rebuilds nested models (model_construct alone leaves them as dicts)"""
+    nested = _nested_fields(model)
+    if nested:
+        data = dict(data)
+        for name, inner in nested.items():
+            value = data.get(name)
+            if isinstance(value, list):
+                data[name] = [construct(inner, item) if isinstance(item, dict) else item for item in value]
+            elif isinstance(value, dict):
+                data[name] = construct(inner, value)
+    return model.model_construct(**data)
+
+
+# The only non-JSON type in the dumped models; tagged so it comes back as a datetime
+DATETIME_TAG = "$datetime"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {DATETIME_TAG: value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and DATETIME_TAG in value:
+        return datetime.fromisoformat(value[DATETIME_TAG])
+    return value
+
+
+def build_snapshot(content: Optional[SeedContent] = None, path: Path = SNAPSHOT_PATH) -> int:
+    """Write the snapshot atomically; returns its size in bytes"""
+    content = content if content is not None else load_from_source()
+    sections: Dict[str, Union[dict, list]] = {
+        name: value.model_dump() if isinstance(value, BaseModel) else [item.model_dump() for item in value]
+        for name, value in content.items()
+    }
+    payload = json.dumps(
+        {"fingerprint": source_fingerprint(), "sections": sections}, default=_json_default, ensure_ascii=False
+    ).encode("utf-8")
+    # A private temporary per writer, so concurrent builds never interleave
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.chmod(temporary, 0o644)  # mkstemp creates it owner-only
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return len(payload)
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[SeedContent]:
+    """Rehydrated seed content, or None if the snapshot is missing or stale"""
+    try:
+        snapshot = json.loads(path.read_bytes(), object_hook=_json_object)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Unreadable seed snapshot {path}: {e}")
+        return None
+    if snapshot.get("fingerprint") != source_fingerprint() or set(snapshot["sections"]) != set(SECTIONS):
+        return None
+    return {
+        name: construct(SECTIONS[name], value) if isinstance(value, dict)
+        else [construct(SECTIONS[name], item) for item in value]
+        for name, value in snapshot["sections"].items()
+    }
+
+
+@lru_cache(maxsize=1)
+def seed_content() -> SeedContent:
+    """Seed catalog, design studio options, downloads and settings; from the snapshot when it is current"""
+    if not SNAPSHOT_ENABLED:
+        return load_from_source()
+    content = load_snapshot()
+    if content is not None:
+        return content
+    logger.info(f"Seed snapshot {SNAPSHOT_PATH} missing or stale; run `python seed_snapshot.py build` to skip validation at startup")
+    return load_from_source()
+
+
+# ===================== IMPORT BUDGET =====================
+def profile_import(module: str = "server") -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter with -X importtime and split the time by owner"""
+    env = {**os.environ, "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:27017")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    app: Dict[str, float] = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name == module:
+            total = int(cumulative_us) / 1000
+        if name in APP_MODULES:
+            app[name] = int(self_us) / 1000
+    return {"total_ms": total, "app_ms": sum(app.values()), "app_modules": app}
+
+
+def check_import_budget(budget_ms: float = DEFAULT_IMPORT_BUDGET_MS, runs: int = 5) -> bool:
+    """Median total import time of the app over `runs` cold imports, compared with the budget.
+
+    A worker pays for its dependencies (fastapi, motor, numpy) on every boot,
+    so they count; the split between them and app modules is only reported.
+    Read-only: without a current snapshot the check fails rather than timing
+    a boot the deploy will not have.
+    """
+    if SNAPSHOT_ENABLED and load_snapshot(SNAPSHOT_PATH) is None:
+        print(f"❌ seed snapshot {SNAPSHOT_PATH} missing or stale; run `python seed_snapshot.py build` first")
+        return False
+    profiles = sorted((profile_import() for _ in range(runs)), key=lambda p: p["total_ms"])
+    median = profiles[len(profiles) // 2]
+    print(f"import server: {median['total_ms']:.1f} ms total, "
+          f"{median['total_ms'] - median['app_ms']:.1f} ms dependencies, {median['app_ms']:.1f} ms app")
+    for name, ms in sorted(median["app_modules"].items(), key=lambda item: -item[1])[:8]:
+        print(f"  {name:<24} {ms:7.1f} ms")
+    within = median["total_ms"] <= budget_ms
+    print(f"{'✅' if within else '❌'} import time {median['total_ms']:.1f} ms (budget {budget_ms:g} ms)")
+    return within
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the seed snapshot or check the import-time budget")
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    if args.command == "build":
+        print(f"Wrote {SNAPSHOT_PATH} ({build_snapshot()} bytes)")
+    else:
+        sys.exit(0 if check_import_budget(args.budget_ms, args.runs) else 1)
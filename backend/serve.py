@@ -0,0 +1,307 @@
+"""Preload Serving - build the catalog and its caches once, gc.freeze them and fork the workers.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker imports the
+seed data, builds the catalog index, search index and design studio tables
+and fills its own response cache. Here the master does all of that, freezes
+the result out of the garbage collector and forks; the workers share those
+pages copy-on-write and only pay for what they allocate themselves.
+
+    python serve.py run --workers 4 --port 8001
+    python serve.py memory --pid <master pid>   # or: kill -USR1 <master pid>
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("serve")
+
+DEFAULT_WORKERS = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# Seconds after the workers start before the first memory report is logged (0 disables it)
+DEFAULT_REPORT_AFTER = float(os.environ.get('MEMORY_REPORT_AFTER', '30'))
+
+# Detail routes prerendered for every catalog item; other catalog GET routes are warmed with their defaults
+DETAIL_ROUTES: Dict[str, Callable[[Any], Iterable[str]]] = {
+    "/api/products/{slug}": lambda catalog: (product.slug for product in catalog.products),
+    "/api/projects/{slug}": lambda catalog: (project.slug for project in catalog.projects),
+    "/api/blog/{slug}": lambda catalog: (post.slug for post in catalog.blog_posts),
+    "/api/cities/{slug}": lambda catalog: (city.slug for city in catalog.active_cities),
+}
+
+# Query variants the frontend requests besides the defaults
+WARM_QUERIES: Dict[str, Tuple[str, ...]] = {
+    "/api/projects": ("view=card",),
+    "/api/blog": ("view=card",),
+}
+
+# kB fields read from /proc/<pid>/smaps_rollup
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+# ===================== PRELOAD =====================
+def warm_paths(app, catalog) -> List[Tuple[str, str]]:
+    """(path, query) for every catalog GET route.
+
+    Routes under the leads/no-store policies touch MongoDB and routes that
+    need query parameters (search) have no default response; both are skipped.
+    """
+    from fastapi.routing import APIRoute
+    from http_cache import DEFAULT_ROUTE_POLICY, route_policy
+
+    paths = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods:
+            continue
+        if route_policy(route.path) != DEFAULT_ROUTE_POLICY:
+            continue
+        if any(param.required for param in route.dependant.query_params):
+            continue
+        if "{" in route.path:
+            expand = DETAIL_ROUTES.get(route.path)
+            if expand:
+                paths.extend((route.path.replace("{slug}", slug), "") for slug in expand(catalog))
+            continue
+        paths.extend((route.path, query) for query in ("", *WARM_QUERIES.get(route.path, ())))
+    return paths
+
+
+async def _get(asgi, path: str, query: str, coding: Optional[str]) -> int:
+    """Run one GET through `asgi` in process and return its status"""
+    status = 0
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "client": None, "server": None,
+        "headers": [(b"accept-encoding", coding.encode())] if coding else [],
+    }
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect until they are done
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            finished.set()
+
+    await asgi(scope, receive, send)
+    finished.set()
+    return status
+
+
+async def warm_caches(app, catalog) -> Dict[str, int]:
+    """Fill the response cache and the sitemap for the live catalog.
+
+    Requests go straight to the router, so metrics and the HTTP middlewares
+    never see them. Compressed variants are built afterwards by
+    ResponseCache.compress_best.
+    """
+    requests = failed = 0
+    for path, query in warm_paths(app, catalog):
+        try:
+            status = await _get(app.router, path, query, None)
+        except Exception as e:
+            logger.warning(f"Warming {path}?{query} failed: {e}")
+            status = 500
+        requests += 1
+        failed += status >= 400
+    return {"requests": requests, "failed": failed}
+
+
+def preload() -> Dict[str, Any]:
+    """Import the app, load the catalog and prebuild its caches, then freeze everything for sharing"""
+    gc.disable()  # nothing allocated from here on is collected before the freeze
+    import server
+
+    if server.catalog_watcher:
+        try:
+            asyncio.run(server.preload_catalog())
+        except Exception as e:
+            logger.error(f"Catalog not preloaded from MongoDB, each worker will load it: {e}")
+    warmed = asyncio.run(warm_caches(server.app, server.catalog))
+    server.response_cache.compress_best()  # the shared variants are built once, so spend the CPU on size
+    gc.collect()
+    gc.freeze()
+    return {
+        "catalog_version": server.catalog.version,
+        "cached_responses": len(server.response_cache),
+        "frozen_objects": gc.get_freeze_count(),
+        **warmed,
+    }
+
+
+# ===================== MEMORY REPORT =====================
+def memory_usage(pid: int) -> Dict[str, int]:
+    """kB totals for a process from /proc/<pid>/smaps_rollup (Linux 4.14+)"""
+    usage = dict.fromkeys(SMAPS_FIELDS, 0)
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as rollup:
+        for line in rollup:
+            name, _, value = line.partition(":")
+            if name in usage:
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return sorted(children)
+
+
+def memory_report(master: int, workers: Dict[int, str]) -> str:
+    """Per-process RSS, PSS and shared/private split.
+
+    Private memory is what one more worker costs; shared pages (the frozen
+    catalog and caches) are paid once, which PSS spreads across the processes.
+    """
+    lines = [f"{'process':<10} {'pid':>7} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10} {'private MB':>11}"]
+    totals = {"Pss": 0, "Rss": 0}
+    private: List[int] = []
+    for pid, name in [(master, "master"), *workers.items()]:
+        try:
+            usage = memory_usage(pid)
+        except OSError:
+            continue
+        shared = usage["Shared_Clean"] + usage["Shared_Dirty"]
+        own = usage["Private_Clean"] + usage["Private_Dirty"]
+        totals["Pss"] += usage["Pss"]
+        totals["Rss"] += usage["Rss"]
+        if pid != master:
+            private.append(own)
+        lines.append(
+            f"{name:<10} {pid:>7} {usage['Rss'] / 1024:>8.1f} {usage['Pss'] / 1024:>8.1f} "
+            f"{shared / 1024:>10.1f} {own / 1024:>11.1f}"
+        )
+    lines.append(f"total PSS {totals['Pss'] / 1024:.1f} MB (sum of RSS {totals['Rss'] / 1024:.1f} MB)")
+    if private:
+        lines.append(f"each additional worker: ~{sum(private) / len(private) / 1024:.1f} MB private")
+    return "\n".join(lines)
+
+
+# ===================== PREFORK SERVER =====================
+class PreforkServer:
+    """Forks `workers` uvicorn servers off one preloaded interpreter and keeps them running.
+
+    The master binds the listening socket, preloads, then only supervises:
+    crashed workers are re-forked into the same slot (the replacement claims
+    the dead worker's lead queue journal), SIGTERM/SIGINT stop everything and
+    SIGUSR1 logs the memory report.
+    """
+
+    def __init__(self, host: str, port: int, workers: int, report_after: float = DEFAULT_REPORT_AFTER):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.report_after = report_after
+        self.children: Dict[int, int] = {}  # pid -> slot
+        self.stopping = False
+
+    def run(self) -> None:
+        import uvicorn
+
+        config = uvicorn.Config("server:app", host=self.host, port=self.port, lifespan="on", log_config=None)
+        sock = config.bind_socket()
+        started = time.perf_counter()
+        stats = preload()
+        logger.info(f"Preloaded in {time.perf_counter() - started:.1f}s: {stats}")
+
+        config.load()  # wraps the (already imported) app before the fork too
+        for slot in range(self.workers):
+            self.spawn(config, sock, slot)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGUSR1, self._report)
+        signal.signal(signal.SIGALRM, self._report)
+        if self.report_after > 0:
+            signal.setitimer(signal.ITIMER_REAL, self.report_after)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            logger.error(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+            time.sleep(1)
+            self.spawn(config, sock, slot)
+        sock.close()
+
+    def spawn(self, config, sock, slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            return
+        code = 0
+        try:
+            self._serve(config, sock, slot)
+        except BaseException as e:
+            logger.exception(f"Worker {slot} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _serve(self, config, sock, slot: int) -> None:
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        gc.enable()  # the preloaded objects stay frozen; only this worker's own allocations are collected
+        logger.info(f"Worker {slot} serving (pid {os.getpid()})")
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _report(self, signum, frame) -> None:
+        workers = {pid: f"worker {slot}" for pid, slot in sorted(self.children.items(), key=lambda item: item[1])}
+        logger.info("Worker memory\n" + memory_report(os.getpid(), workers))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the API from preloaded, forked workers")
+    parser.add_argument("command", choices=("run", "memory"))
+    parser.add_argument("--host", default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', '8001')))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--report-after", type=float, default=DEFAULT_REPORT_AFTER)
+    parser.add_argument("--pid", type=int, help="master pid for the memory command")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "run":
+        PreforkServer(args.host, args.port, args.workers, args.report_after).run()
+    else:
+        if args.pid is None:
+            parser.error("memory needs --pid")
+        print(memory_report(args.pid, {pid: "worker" for pid in child_pids(args.pid)}))
@@ -1,33 +1,75 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional
-from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, List, Optional
+from datetime import datetime, timedelta, timezone
 import json
 
-from models import (
-    Lead, LeadCreate, LeadUpdate,
-    Product, Project, BlogPost, FAQ, Testimonial, City,
-    ColorFinish, GlassOption, Hardware, Download, GlobalSettings
-)
-from seed_data import (
-    ALL_PRODUCTS, PROJECTS, BLOG_POSTS, FAQS, TESTIMONIALS, CITIES,
-    COLOR_FINISHES, GLASS_OPTIONS, HARDWARE_ITEMS, DOWNLOADS, GLOBAL_SETTINGS
-)
+from models import Lead, LeadCreate, LeadUpdate, QuoteRequest, PerformanceRequest, as_utc_datetime
+from seed_snapshot import seed_content
+from catalog import CatalogIndex, load_design_studio, load_seed_catalog, resolve_fields
+from catalog_store import CatalogWatcher, current_version, load_catalog, seed_catalog
+from response_cache import CachedJSONResponse, ETagJSONResponse, ResponseCache
+from http_cache import HTTPCacheMiddleware, accepts_encoding
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, MetricsRegistry
+from sitemap import SitemapCache, SitemapDocument
+from pagination import KEYSET_SORT, InvalidCursor, encode_cursor, keyset_filter
+from lead_export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_PROJECTION, iter_csv, iter_ndjson, lead_filter
+from lead_queue import LeadIngestQueue, LeadQueueFull
+from lead_import import detect_format, import_leads
+from lead_dedupe import LeadDeduplicator, dedupe_key
+from lead_stats import LeadStats
+from lead_reader import LEAD_FIELDS, LEAD_PROJECTION, LeadReader, render_leads
+from search import SearchIndex, catalog_documents
+from pricing import PricingEngine, PricingError
+from specs import SpecIndex
+from compatibility import CompatibilitySolver
+from performance import PerformanceSimulator, SimulationError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Per-route request metrics; the command listener attributes Mongo time to requests
+metrics = MetricsRegistry()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[metrics.command_listener])
 db = client[os.environ.get('DB_NAME', 'krystal_db')]
 
+# Repeat submissions from the same phone merge into the open lead
+lead_deduplicator = LeadDeduplicator(
+    db.leads,
+    window=timedelta(days=int(os.environ.get('LEAD_DEDUPE_WINDOW_DAYS', '30')))
+)
+
+# Dashboard aggregations, cached for a few seconds
+lead_stats = LeadStats(db.leads, ttl=float(os.environ.get('LEAD_STATS_TTL', '30')))
+lead_reader = LeadReader(db.leads)
+
+# Write-behind batching for new leads (LEAD_QUEUE_ENABLED=false writes each lead inline)
+lead_queue = None
+if os.environ.get('LEAD_QUEUE_ENABLED', 'true').lower() == 'true':
+    journal = os.environ.get('LEAD_QUEUE_JOURNAL', str(ROOT_DIR / 'lead_queue.journal'))
+    lead_queue = LeadIngestQueue(
+        db.leads,
+        batch_size=int(os.environ.get('LEAD_QUEUE_BATCH_SIZE', '500')),
+        flush_interval=int(os.environ.get('LEAD_QUEUE_FLUSH_MS', '50')) / 1000,
+        max_depth=int(os.environ.get('LEAD_QUEUE_MAX_DEPTH', '10000')),
+        journal_path=Path(journal) if journal else None,
+        fsync=os.environ.get('LEAD_QUEUE_FSYNC', 'false').lower() == 'true',
+        on_conflict=lead_deduplicator.merge_or_insert,
+        on_duplicate=lead_deduplicator.absorb,
+    )
+
 # Create the main app
 app = FastAPI(title="Krystal Magic World API", version="1.0.0")
 
@@ -41,6 +83,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Downloads and settings come straight from the seed content (snapshot when current)
+DOWNLOADS = seed_content()['downloads']
+GLOBAL_SETTINGS = seed_content()['settings']
+
+# Catalog lookup tables. The bundled seed catalog serves until startup loads the
+# MongoDB catalog; later edits are swapped in whole by reload_catalog
+design_studio = load_design_studio()
+pricing = PricingEngine(design_studio)
+response_cache = ResponseCache()
+sitemaps = SitemapCache()
+search_index = SearchIndex()
+
+def build_catalog_services(index: CatalogIndex) -> tuple:
+    """Lookup structures derived from a catalog, built before it goes live"""
+    index_specs = SpecIndex(index, design_studio)
+    return index_specs, CompatibilitySolver(index, design_studio, index_specs), PerformanceSimulator(index_specs)
+
+def install_catalog(index: CatalogIndex, services: tuple) -> None:
+    """Make a new catalog live in one step.
+
+    Runs without awaiting, so no request handler observes a mix of old and
+    new structures; response and sitemap caches key on the catalog version
+    and the search index only re-indexes documents that changed.
+    """
+    global catalog, specs, compatibility, performance
+    specs, compatibility, performance = services
+    catalog = index
+    search_index.sync(catalog_documents(index))
+
+seed_index = load_seed_catalog()
+install_catalog(seed_index, build_catalog_services(seed_index))
+
+async def reload_catalog() -> None:
+    index = await load_catalog(db)
+    services = await asyncio.to_thread(build_catalog_services, index)
+    install_catalog(index, services)
+    logger.info(f"Catalog v{index.version} live: {len(index.products)} products, {len(index.blog_posts)} posts")
+
+# catalog_meta version of a catalog loaded by the serving master before it forked (serve.py)
+preloaded_catalog_version: Optional[int] = None
+
+async def preload_catalog() -> None:
+    """Load the MongoDB catalog ahead of forking workers.
+
+    Uses its own client, closed again before returning, so no connection or
+    monitor thread is inherited by the workers.
+    """
+    global preloaded_catalog_version
+    preload_client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    try:
+        preload_db = preload_client[db.name]
+        await seed_catalog(preload_db)
+        version = await current_version(preload_db)
+        index = await load_catalog(preload_db)
+        install_catalog(index, build_catalog_services(index))
+        preloaded_catalog_version = version
+    finally:
+        preload_client.close()
+
+# Catalog edits in MongoDB reach every worker through a change stream or version polling
+catalog_watcher = None
+if os.environ.get('CATALOG_SOURCE', 'mongo').lower() == 'mongo':
+    catalog_watcher = CatalogWatcher(
+        db, reload_catalog,
+        poll_interval=float(os.environ.get('CATALOG_POLL_INTERVAL', '30')),
+        change_streams=os.environ.get('CATALOG_CHANGE_STREAMS', 'true').lower() == 'true',
+    )
+
 # Serialization helper
 def serialize_doc(doc: dict) -> dict:
     """Convert MongoDB document for JSON serialization"""
@@ -49,11 +159,26 @@ def serialize_doc(doc: dict) -> dict:
     result = dict(doc)
     if '_id' in result:
         del result['_id']
+    # Dates are BSON dates (ISO strings on leads not yet migrated); naive ones are UTC
     for key, value in result.items():
         if isinstance(value, datetime):
-            result[key] = value.isoformat()
+            result[key] = as_utc_datetime(value).isoformat()
     return result
 
+def cached_json(endpoint: str, params: Hashable, build: Callable[[], Any]) -> Response:
+    """Serve a catalog payload from the pre-serialized response cache"""
+    return CachedJSONResponse(response_cache.get_or_build(catalog.version, endpoint, params, build))
+
+# Sparse fieldsets for the list endpoints
+VIEW_QUERY = Query(default=None, pattern="^(card|detail)$", description="Named projection: card or detail (default)")
+FIELDS_QUERY = Query(default=None, description="Comma-separated fields to return; overrides view")
+
+def list_projection(kind: str, view: Optional[str], fields: Optional[str]) -> Optional[tuple]:
+    try:
+        return resolve_fields(kind, view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ===================== HEALTH & ROOT =====================
 @api_router.get("/")
 async def root():
@@ -61,45 +186,132 @@ async def root():
 
 @api_router.get("/health")
 async def health_check():
+    queue = lead_queue.stats() if lead_queue else None
     try:
         await db.command('ping')
-        return {"status": "healthy", "database": "connected"}
+        return {"status": "healthy", "database": "connected", "lead_queue": queue}
     except Exception as e:
-        return {"status": "unhealthy", "database": str(e)}
+        return {"status": "unhealthy", "database": str(e), "lead_queue": queue}
 
 # ===================== LEADS =====================
 @api_router.post("/leads", response_model=Lead)
 async def create_lead(lead_data: LeadCreate):
     """Create a new lead from contact forms"""
     lead = Lead(**lead_data.model_dump())
+    if lead.configuration:
+        lead.estimate = estimate_configuration(lead_data.model_dump()['configuration'])
     doc = lead.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.leads.insert_one(doc)
+    doc['dedupe_key'] = dedupe_key(doc)
+    
+    if lead_queue:
+        # A repeat submission still in the queue merges into the queued lead; one
+        # of a lead already in MongoDB is merged when its batch hits the unique index
+        try:
+            merged = await lead_queue.enqueue(doc)
+        except LeadQueueFull as e:
+            logger.error(f"Lead {lead.id} refused: {e}")
+            raise HTTPException(status_code=503, detail="Lead intake is busy, please retry", headers={"Retry-After": "5"})
+        if merged is not None:
+            return Lead(**serialize_doc(merged))
+    else:
+        try:
+            await db.leads.insert_one(doc)
+        except DuplicateKeyError:
+            merged = await lead_deduplicator.merge_or_insert(doc)
+            return Lead(**serialize_doc(merged))
     logger.info(f"New lead created: {lead.id} - {lead.lead_type}")
     return lead
 
+@api_router.post("/leads/bulk")
+async def bulk_import_leads(request: Request, source: str = "bulk_import"):
+    """Import leads from a CSV, NDJSON or JSON array request body.
+
+    The body is parsed as it streams in; every row is validated against
+    LeadCreate and valid rows are inserted in unordered batches. The response
+    reports totals and the errors of each rejected row.
+    """
+    fmt = detect_format(request.headers.get("content-type"))
+    if not fmt:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv, application/x-ndjson or application/json"
+        )
+    report = await import_leads(
+        request.stream(), fmt, db.leads, source=source,
+        on_conflict=lead_deduplicator.merge_or_insert,
+        estimator=estimate_configuration
+    )
+    logger.info(f"Bulk lead import: {report.inserted} inserted, {report.merged} merged, {report.failed} failed")
+    return report.as_dict()
+
 @api_router.get("/leads")
 async def get_leads(
     status: Optional[str] = None,
     lead_type: Optional[str] = None,
-    limit: int = Query(default=100, le=500)
+    limit: int = Query(default=100, le=500),
+    cursor: Optional[str] = None
 ):
-    """Get all leads with optional filters"""
-    query = {}
-    if status:
-        query['status'] = status
-    if lead_type:
-        query['lead_type'] = lead_type
+    """Get leads newest first with optional filters.
+
+    Pages are keyset-paginated on (created_at, id): pass the X-Next-Cursor
+    header of one page as `cursor` to fetch the next one. Rows are rendered
+    from raw BSON into a pre-built JSON body.
+    """
+    try:
+        query = {**lead_filter(status, lead_type), **keyset_filter(cursor)}
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    cursor = db.leads.find(query, {"_id": 0}).sort("created_at", -1).limit(limit)
-    leads = await cursor.to_list(length=limit)
-    return [serialize_doc(lead) for lead in leads]
+    # One extra row tells us whether another page exists
+    leads = await lead_reader.find(query, KEYSET_SORT, limit + 1)
+    headers = {}
+    if len(leads) > limit:
+        leads = leads[:limit]
+        last = leads[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last['created_at'], last['id'])
+    return Response(content=render_leads(leads), media_type="application/json", headers=headers)
+
+@api_router.get("/leads/stats")
+async def get_lead_stats(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Lead counts by status, type, city, source and day plus the status funnel"""
+    match = lead_filter(date_from=date_from, date_to=date_to)
+    return await lead_stats.get((date_from, date_to), match)
+
+@api_router.get("/leads/export")
+async def export_leads(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None,
+    lead_type: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Stream leads oldest first as NDJSON or CSV"""
+    query = lead_filter(status, lead_type, date_from, date_to)
+    db_cursor = db.leads.find(query, EXPORT_PROJECTION).sort([("created_at", 1), ("id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    body = iter_csv(db_cursor) if format == "csv" else iter_ndjson(db_cursor)
+    filename = f"leads-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def find_merged_lead(lead_id: str) -> Optional[dict]:
+    """The lead a repeat submission was merged into, looked up by the submission's id"""
+    return await db.leads.find_one({"submissions.id": lead_id}, LEAD_PROJECTION)
 
 @api_router.get("/leads/{lead_id}")
 async def get_lead(lead_id: str):
-    """Get a single lead by ID"""
-    lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
+    """Get a single lead by ID (or by the ID returned for a submission merged into it)"""
+    lead = await db.leads.find_one({"id": lead_id}, LEAD_PROJECTION)
+    if not lead and lead_queue:
+        pending = lead_queue.find_pending(lead_id)
+        lead = {field: pending[field] for field in LEAD_FIELDS if field in pending} if pending else None
+    if not lead:
+        lead = await find_merged_lead(lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     return serialize_doc(lead)
@@ -108,14 +320,22 @@ async def get_lead(lead_id: str):
 async def update_lead(lead_id: str, update: LeadUpdate):
     """Update lead status"""
     update_data = {k: v for k, v in update.model_dump().items() if v is not None}
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['updated_at'] = datetime.now(timezone.utc)
+    
+    if lead_queue and lead_queue.find_pending(lead_id):
+        # Still buffered; write it out so the update has something to match
+        await lead_queue.flush()
     
     result = await db.leads.update_one(
         {"id": lead_id},
         {"$set": update_data}
     )
     if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Lead not found")
+        merged_into = await find_merged_lead(lead_id)
+        if not merged_into:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        lead_id = merged_into['id']
+        await db.leads.update_one({"id": lead_id}, {"$set": update_data})
     
     return {"message": "Lead updated", "id": lead_id}
 
@@ -124,76 +344,71 @@ async def update_lead(lead_id: str, update: LeadUpdate):
 async def get_products(
     category: Optional[str] = None,
     product_type: Optional[str] = None,
-    featured: Optional[bool] = None
+    featured: Optional[bool] = None,
+    view: Optional[str] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """Get all products with optional filters"""
-    products = ALL_PRODUCTS
-    
-    if category:
-        products = [p for p in products if p.category == category]
-    if product_type:
-        products = [p for p in products if p.product_type == product_type]
-    if featured is not None:
-        products = [p for p in products if p.is_featured == featured]
-    
-    return [p.model_dump() for p in sorted(products, key=lambda x: x.order)]
+    projection = list_projection("products", view, fields)
+    return cached_json(
+        "products", (category, product_type, featured, projection),
+        lambda: [catalog.dump(p, projection) for p in catalog.filter_products(category, product_type, featured)]
+    )
 
 @api_router.get("/products/{slug}")
 async def get_product(slug: str):
     """Get a single product by slug"""
-    product = next((p for p in ALL_PRODUCTS if p.slug == slug), None)
+    product = catalog.product_by_slug.get(slug)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product.model_dump()
+    return cached_json("product", slug, product.model_dump)
 
 # ===================== PROJECTS =====================
 @api_router.get("/projects")
 async def get_projects(
     city: Optional[str] = None,
     project_type: Optional[str] = None,
-    featured: Optional[bool] = None
+    featured: Optional[bool] = None,
+    view: Optional[str] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """Get all projects with optional filters"""
-    projects = PROJECTS
-    
-    if city:
-        projects = [p for p in projects if p.city.lower() == city.lower()]
-    if project_type:
-        projects = [p for p in projects if p.project_type == project_type]
-    if featured is not None:
-        projects = [p for p in projects if p.is_featured == featured]
-    
-    return [p.model_dump() for p in projects]
+    projection = list_projection("projects", view, fields)
+    return cached_json(
+        "projects", (city.lower() if city else None, project_type, featured, projection),
+        lambda: [catalog.dump(p, projection) for p in catalog.filter_projects(city, project_type, featured)]
+    )
 
 @api_router.get("/projects/{slug}")
 async def get_project(slug: str):
     """Get a single project by slug"""
-    project = next((p for p in PROJECTS if p.slug == slug), None)
+    project = catalog.project_by_slug.get(slug)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project.model_dump()
+    return cached_json("project", slug, project.model_dump)
 
 # ===================== BLOG =====================
 @api_router.get("/blog")
 async def get_blog_posts(
     category: Optional[str] = None,
-    limit: int = Query(default=10, le=50)
+    limit: int = Query(default=10, le=50),
+    view: Optional[str] = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """Get all blog posts"""
-    posts = BLOG_POSTS
-    
-    if category:
-        posts = [p for p in posts if p.category == category]
-    
-    return [p.model_dump() for p in posts[:limit]]
+    projection = list_projection("blog", view, fields)
+    return cached_json(
+        "blog", (category, limit, projection),
+        lambda: [catalog.dump(p, projection) for p in catalog.filter_blog_posts(category)[:limit]]
+    )
 
 @api_router.get("/blog/{slug}")
 async def get_blog_post(slug: str):
     """Get a single blog post by slug"""
-    post = next((p for p in BLOG_POSTS if p.slug == slug), None)
+    post = catalog.blog_post_by_slug.get(slug)
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return post.model_dump()
+    return cached_json("blog_post", slug, post.model_dump)
 
 # ===================== FAQS =====================
 @api_router.get("/faqs")
@@ -202,134 +417,201 @@ async def get_faqs(
     featured: Optional[bool] = None
 ):
     """Get all FAQs"""
-    faqs = FAQS
-    
-    if category:
-        faqs = [f for f in faqs if f.category == category]
-    if featured is not None:
-        faqs = [f for f in faqs if f.is_featured == featured]
-    
-    return [f.model_dump() for f in sorted(faqs, key=lambda x: x.order)]
+    return cached_json(
+        "faqs", (category, featured),
+        lambda: [f.model_dump() for f in catalog.filter_faqs(category, featured)]
+    )
 
 # ===================== TESTIMONIALS =====================
 @api_router.get("/testimonials")
 async def get_testimonials(featured: Optional[bool] = None):
     """Get all testimonials"""
-    testimonials = TESTIMONIALS
-    
-    if featured is not None:
-        testimonials = [t for t in testimonials if t.is_featured == featured]
-    
-    return [t.model_dump() for t in testimonials]
+    return cached_json(
+        "testimonials", featured,
+        lambda: [t.model_dump() for t in catalog.filter_testimonials(featured)]
+    )
 
 # ===================== CITIES/SERVICE AREAS =====================
 @api_router.get("/cities")
 async def get_cities():
     """Get all service area cities"""
-    return [c.model_dump() for c in CITIES if c.is_active]
+    return cached_json("cities", None, lambda: [c.model_dump() for c in catalog.active_cities])
 
 @api_router.get("/cities/{slug}")
 async def get_city(slug: str):
-    """Get a single city by slug"""
-    city = next((c for c in CITIES if c.slug == slug), None)
-    if not city:
+    """Get a single city with its testimonials, projects, featured FAQs and product highlights"""
+    if slug not in catalog.city_by_slug:
         raise HTTPException(status_code=404, detail="City not found")
-    
-    # Get related data for this city
-    city_data = city.model_dump()
-    city_data['testimonials'] = [t.model_dump() for t in TESTIMONIALS if city.name in t.location]
-    city_data['projects'] = [p.model_dump() for p in PROJECTS if p.city == city.name]
-    city_data['faqs'] = [f.model_dump() for f in FAQS if f.is_featured][:5]
-    
-    return city_data
+    return cached_json("city", slug, lambda: catalog.city_bundle(slug))
 
 # ===================== DESIGN STUDIO =====================
+@api_router.get("/design-studio/catalog")
+async def get_design_studio_catalog():
+    """All colors, glass, hardware and profile systems plus facet counts in one payload"""
+    return cached_json("design_studio_catalog", None, design_studio.bundle)
+
 @api_router.get("/design-studio/colors")
-async def get_color_finishes(category: Optional[str] = None):
+async def get_color_finishes(category: Optional[str] = None, popular: Optional[bool] = None):
     """Get all color finishes"""
-    colors = COLOR_FINISHES
-    if category:
-        colors = [c for c in colors if c.category == category]
-    return [c.model_dump() for c in colors]
+    return cached_json(
+        "design_studio_colors", (category, popular),
+        lambda: [c.model_dump() for c in design_studio.filter_colors(category, popular)]
+    )
 
 @api_router.get("/design-studio/glass")
-async def get_glass_options():
+async def get_glass_options(
+    thickness: Optional[float] = Query(default=None, description="Available thickness in mm"),
+    best_for: Optional[str] = None
+):
     """Get all glass options"""
-    return [g.model_dump() for g in GLASS_OPTIONS]
+    return cached_json(
+        "design_studio_glass", (thickness, best_for),
+        lambda: [g.model_dump() for g in design_studio.filter_glass(thickness, best_for)]
+    )
 
 @api_router.get("/design-studio/hardware")
-async def get_hardware(category: Optional[str] = None):
+async def get_hardware(
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    finish: Optional[str] = None
+):
     """Get all hardware items"""
-    hardware = HARDWARE_ITEMS
-    if category:
-        hardware = [h for h in hardware if h.category == category]
-    return [h.model_dump() for h in hardware]
+    return cached_json(
+        "design_studio_hardware", (category, brand, finish),
+        lambda: [h.model_dump() for h in design_studio.filter_hardware(category, brand, finish)]
+    )
+
+@api_router.get("/design-studio/compatibility")
+async def check_compatibility(
+    product: Optional[str] = Query(default=None, description="Product slug"),
+    profile: Optional[str] = None,
+    glass: Optional[str] = None,
+    color: Optional[str] = None,
+    hardware: Optional[str] = Query(default=None, description="Comma-separated hardware ids"),
+    width_mm: Optional[float] = Query(default=None, gt=0),
+    height_mm: Optional[float] = Query(default=None, gt=0)
+):
+    """Options that remain valid given the current design studio selections"""
+    selections = {
+        "product": [product] if product else [],
+        "profile": [profile] if profile else [],
+        "glass": [glass] if glass else [],
+        "color": [color] if color else [],
+        "hardware": [h.strip() for h in hardware.split(",") if h.strip()] if hardware else [],
+    }
+    try:
+        return ETagJSONResponse(compatibility.solve(selections, width_mm, height_mm))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/design-studio/profiles")
+async def get_profile_systems():
+    """Get all uPVC profile systems"""
+    return cached_json("design_studio_profiles", None, lambda: [p.model_dump() for p in design_studio.profiles])
+
+# ===================== QUOTES =====================
+def estimate_configuration(openings: List[dict]) -> Optional[dict]:
+    """Price a lead's configuration; a lead is never rejected because its schedule cannot be priced"""
+    try:
+        return pricing.estimate(openings)
+    except PricingError as e:
+        logger.warning(f"Lead configuration not priced: {e}")
+        return None
+
+@api_router.post("/quote/estimate")
+async def estimate_quote(quote: QuoteRequest):
+    """Itemized price estimate for a schedule of openings"""
+    try:
+        return pricing.estimate(quote.model_dump()['openings'])
+    except PricingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ===================== PERFORMANCE =====================
+@api_router.get("/performance/specs")
+async def get_performance_specs():
+    """Numeric performance attributes parsed from product, glass and profile specs"""
+    return cached_json("performance_specs", None, specs.as_dict)
+
+@api_router.post("/performance/simulate")
+async def simulate_performance(request: PerformanceRequest):
+    """Annual heat gain, AC cost savings and sound reduction for every profile x glass combination"""
+    try:
+        return performance.simulate(
+            request.city, request.model_dump()['facades'],
+            request.profile_ids, request.glass_ids, request.tariff_per_kwh
+        )
+    except SimulationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ===================== SEARCH =====================
+@api_router.get("/search")
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    type: Optional[str] = Query(default=None, description="Comma-separated: product, blog, faq, project"),
+    limit: int = Query(default=10, ge=1, le=50)
+):
+    """Ranked site search with prefix (autocomplete) and typo-tolerant matching"""
+    types = {t.strip() for t in type.split(",") if t.strip()} if type else None
+    return ETagJSONResponse({"query": q, "results": search_index.search(q, limit=limit, types=types)})
 
 # ===================== DOWNLOADS =====================
 @api_router.get("/downloads")
 async def get_downloads(category: Optional[str] = None):
     """Get all downloadable resources"""
-    downloads = DOWNLOADS
-    if category:
-        downloads = [d for d in downloads if d.category == category]
-    return [d.model_dump() for d in downloads]
+    return cached_json(
+        "downloads", category,
+        lambda: [d.model_dump() for d in DOWNLOADS if not category or d.category == category]
+    )
 
 # ===================== SETTINGS =====================
 @api_router.get("/settings")
 async def get_settings():
     """Get global site settings"""
-    return GLOBAL_SETTINGS.model_dump()
+    return cached_json("settings", None, GLOBAL_SETTINGS.model_dump)
 
 # ===================== SITEMAP =====================
+def sitemap_response(document: SitemapDocument, request: Request) -> StreamingResponse:
+    """Stream a stored sitemap, gzip-encoded when the client accepts it"""
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(document.gzipped))
+        headers["ETag"] = f'"{document.etag}-gz"'
+        body = document.iter_gzip()
+    else:
+        headers["Content-Length"] = str(document.size)
+        headers["ETag"] = f'"{document.etag}"'
+        body = document.iter_identity()
+    return StreamingResponse(body, media_type="application/xml", headers=headers)
+
 @api_router.get("/sitemap.xml")
-async def get_sitemap():
-    """Generate XML sitemap for SEO"""
-    base_url = "https://krystalmagicworld.com"
-    
-    urls = [
-        (f"{base_url}/", "1.0", "weekly"),
-        (f"{base_url}/about", "0.8", "monthly"),
-        (f"{base_url}/products/windows", "0.9", "weekly"),
-        (f"{base_url}/products/doors", "0.9", "weekly"),
-        (f"{base_url}/design-studio", "0.8", "monthly"),
-        (f"{base_url}/projects", "0.8", "weekly"),
-        (f"{base_url}/blog", "0.8", "weekly"),
-        (f"{base_url}/contact", "0.8", "monthly"),
-    ]
-    
-    # Add product pages
-    for product in ALL_PRODUCTS:
-        urls.append((f"{base_url}/products/{product.slug}", "0.7", "monthly"))
-    
-    # Add project pages
-    for project in PROJECTS:
-        urls.append((f"{base_url}/projects/{project.slug}", "0.7", "monthly"))
-    
-    # Add blog posts
-    for post in BLOG_POSTS:
-        urls.append((f"{base_url}/blog/{post.slug}", "0.6", "monthly"))
-    
-    # Add city pages
-    for city in CITIES:
-        urls.append((f"{base_url}/upvc-windows-in-{city.slug}", "0.7", "monthly"))
-        urls.append((f"{base_url}/upvc-doors-in-{city.slug}", "0.7", "monthly"))
-    
-    xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml_content += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    
-    for url, priority, changefreq in urls:
-        xml_content += f'''  <url>
-    <loc>{url}</loc>
-    <priority>{priority}</priority>
-    <changefreq>{changefreq}</changefreq>
-  </url>\n'''
-    
-    xml_content += '</urlset>'
-    
-    return Response(content=xml_content, media_type="application/xml")
+async def get_sitemap(request: Request):
+    """XML sitemap for SEO (a sitemap index once the catalog passes 50k URLs)"""
+    return sitemap_response(sitemaps.get(catalog).root, request)
+
+@api_router.get("/sitemaps/{name}.xml")
+async def get_child_sitemap(name: str, request: Request):
+    """Child sitemap referenced from the sitemap index"""
+    document = sitemaps.get(catalog).documents.get(name)
+    if not document:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return sitemap_response(document, request)
+
+# ===================== METRICS =====================
+@api_router.get("/metrics")
+async def get_metrics():
+    """Request, latency, response size and MongoDB metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Include router
 app.include_router(api_router)
+metrics.bind_routes(app.routes)
+
+# gzip/brotli negotiation; runs inside the cache middleware so 304s compare encoded ETags
+app.add_middleware(CompressionMiddleware)
+
+# Cache-Control policies and ETag revalidation
+app.add_middleware(HTTPCacheMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -338,8 +620,12 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so timings and sizes cover every other middleware
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Krystal Magic World API starting...")
@@ -347,8 +633,28 @@ async def startup_event():
     await db.leads.create_index("id", unique=True)
     await db.leads.create_index("created_at")
     await db.leads.create_index("status")
+    # Keyset pagination over leads, optionally narrowed by status
+    await db.leads.create_index([("created_at", -1), ("id", -1)])
+    await db.leads.create_index([("status", 1), ("created_at", -1), ("id", -1)])
+    # One open lead per normalized phone; older leads drop the key when released
+    await db.leads.create_index(
+        "dedupe_key", unique=True,
+        partialFilterExpression={"dedupe_key": {"$exists": True}}
+    )
+    # Ids returned for submissions that were merged into another lead
+    await db.leads.create_index("submissions.id")
     logger.info("Database indexes created")
+    if catalog_watcher:
+        # A worker forked from a preloading master keeps the shared catalog unless it changed since
+        await catalog_watcher.start(preloaded_catalog_version)
+    if lead_queue:
+        await lead_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if catalog_watcher:
+        await catalog_watcher.stop()
+    if lead_queue:
+        await lead_queue.drain()
+        logger.info(f"Lead queue drained: {lead_queue.stats()}")
     client.close()
@@ -0,0 +1,162 @@
+"""XML Sitemap - built once per catalog version, stored gzip-compressed, sharded past 50k URLs"""
+
+import hashlib
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from catalog import CatalogIndex
+
+SITE_URL = "https://krystalmagicworld.com"
+
+# sitemaps.org limit for a single <urlset> (and for entries in an index)
+MAX_URLS_PER_SITEMAP = 50000
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# (loc, lastmod, priority, changefreq)
+SitemapUrl = Tuple[str, Optional[datetime], str, str]
+
+STATIC_PAGES: Tuple[Tuple[str, str, str], ...] = (
+    ("/", "1.0", "weekly"),
+    ("/about", "0.8", "monthly"),
+    ("/products/windows", "0.9", "weekly"),
+    ("/products/doors", "0.9", "weekly"),
+    ("/design-studio", "0.8", "monthly"),
+    ("/projects", "0.8", "weekly"),
+    ("/blog", "0.8", "weekly"),
+    ("/contact", "0.8", "monthly"),
+)
+
+
+def _format_lastmod(value: datetime) -> str:
+    """W3C datetime as expected by the sitemap protocol"""
+    if value.tzinfo is None:
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value.isoformat(timespec="seconds")
+
+
+def collect_sections(catalog: CatalogIndex, base_url: str = SITE_URL) -> Dict[str, List[SitemapUrl]]:
+    """All sitemap URLs grouped by the child sitemap they belong to"""
+    pages: List[SitemapUrl] = [(f"{base_url}{path}", None, priority, changefreq) for path, priority, changefreq in STATIC_PAGES]
+    products: List[SitemapUrl] = [
+        (f"{base_url}/products/{product.slug}", product.created_at, "0.7", "monthly")
+        for product in catalog.products
+    ]
+    projects: List[SitemapUrl] = [
+        (f"{base_url}/projects/{project.slug}", project.created_at, "0.7", "monthly")
+        for project in catalog.projects
+    ]
+    blog: List[SitemapUrl] = [
+        (f"{base_url}/blog/{post.slug}", post.created_at, "0.6", "monthly")
+        for post in catalog.blog_posts
+    ]
+    cities: List[SitemapUrl] = []
+    for city in catalog.cities:
+        cities.append((f"{base_url}/upvc-windows-in-{city.slug}", None, "0.7", "monthly"))
+        cities.append((f"{base_url}/upvc-doors-in-{city.slug}", None, "0.7", "monthly"))
+    return {"pages": pages, "products": products, "projects": projects, "blog": blog, "cities": cities}
+
+
+def render_urlset(urls: Iterable[SitemapUrl]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for loc, lastmod, priority, changefreq in urls:
+        yield f'  <url>\n    <loc>{escape(loc)}</loc>\n'
+        if lastmod is not None:
+            yield f'    <lastmod>{_format_lastmod(lastmod)}</lastmod>\n'
+        yield f'    <priority>{priority}</priority>\n    <changefreq>{changefreq}</changefreq>\n  </url>\n'
+    yield '</urlset>'
+
+
+def render_index(children: Iterable[Tuple[str, Optional[datetime]]]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for loc, lastmod in children:
+        yield f'  <sitemap>\n    <loc>{escape(loc)}</loc>\n'
+        if lastmod is not None:
+            yield f'    <lastmod>{_format_lastmod(lastmod)}</lastmod>\n'
+        yield '  </sitemap>\n'
+    yield '</sitemapindex>'
+
+
+class SitemapDocument:
+    """One XML document held as gzip bytes, compressed incrementally while rendering"""
+
+    __slots__ = ("gzipped", "etag", "size")
+
+    def __init__(self, parts: Iterable[str]):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        digest = hashlib.blake2b(digest_size=16)
+        chunks: List[bytes] = []
+        size = 0
+        for part in parts:
+            data = part.encode("utf-8")
+            size += len(data)
+            digest.update(data)
+            chunks.append(compressor.compress(data))
+        chunks.append(compressor.flush())
+        self.gzipped = b"".join(chunks)
+        self.etag = digest.hexdigest()
+        self.size = size
+
+    async def iter_gzip(self) -> AsyncIterator[bytes]:
+        view = memoryview(self.gzipped)
+        for start in range(0, len(view), STREAM_CHUNK_SIZE):
+            yield bytes(view[start:start + STREAM_CHUNK_SIZE])
+
+    async def iter_identity(self) -> AsyncIterator[bytes]:
+        """Inflate chunk by chunk for clients that do not accept gzip"""
+        decompressor = zlib.decompressobj(31)
+        view = memoryview(self.gzipped)
+        for start in range(0, len(view), STREAM_CHUNK_SIZE):
+            data = decompressor.decompress(view[start:start + STREAM_CHUNK_SIZE])
+            if data:
+                yield data
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+class Sitemap:
+    """Root sitemap plus, once the catalog passes the URL limit, its child sitemaps"""
+
+    def __init__(self, catalog: CatalogIndex, base_url: str = SITE_URL, max_urls: int = MAX_URLS_PER_SITEMAP):
+        self.version = catalog.version
+        self.documents: Dict[str, SitemapDocument] = {}
+
+        sections = collect_sections(catalog, base_url)
+        total = sum(len(urls) for urls in sections.values())
+        if total <= max_urls:
+            self.root = SitemapDocument(render_urlset(url for urls in sections.values() for url in urls))
+            return
+
+        children: List[Tuple[str, Optional[datetime]]] = []
+        for section, urls in sections.items():
+            for shard, start in enumerate(range(0, len(urls), max_urls), start=1):
+                chunk = urls[start:start + max_urls]
+                name = f"{section}-{shard}"
+                self.documents[name] = SitemapDocument(render_urlset(chunk))
+                lastmods = [lastmod for _, lastmod, _, _ in chunk if lastmod is not None]
+                children.append((f"{base_url}/api/sitemaps/{name}.xml", max(lastmods) if lastmods else None))
+        self.root = SitemapDocument(render_index(children))
+
+    @property
+    def is_sharded(self) -> bool:
+        return bool(self.documents)
+
+
+class SitemapCache:
+    """Keeps the sitemap for the current catalog version only"""
+
+    def __init__(self, base_url: str = SITE_URL):
+        self.base_url = base_url
+        self._sitemap: Optional[Sitemap] = None
+
+    def get(self, catalog: CatalogIndex) -> Sitemap:
+        sitemap = self._sitemap
+        if sitemap is None or sitemap.version != catalog.version:
+            sitemap = Sitemap(catalog, self.base_url)
+            self._sitemap = sitemap
+        return sitemap
@@ -0,0 +1,114 @@
+"""Spec Parsing - typed numeric attributes from the free-text product, glass and profile specs"""
+
+import re
+from typing import Dict, List, Optional
+
+from catalog import CatalogIndex, DesignStudioIndex, parse_thicknesses
+from models import (
+    GlassOption, GlassPerformance, Product, ProductPerformance, ProfilePerformance, ProfileSystem,
+)
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_SIZE_RE = re.compile(_NUMBER + r"\s*mm\s*x\s*" + _NUMBER + r"\s*mm")
+
+
+def _unit_re(unit: str) -> "re.Pattern[str]":
+    # "1.4 W/m²K", "26-30 dB", "1.6 - 1.1 W/m²K", "45-70%", "60mm"
+    return re.compile(_NUMBER + r"(?:\s*(?:-|–|to)\s*" + _NUMBER + r")?\s*" + unit)
+
+
+U_VALUE_RE = _unit_re(r"W/m")
+DECIBEL_RE = _unit_re(r"dB")
+PERCENT_RE = _unit_re(r"%")
+MM_RE = _unit_re(r"mm")
+KG_RE = _unit_re(r"kg")
+PASCAL_WIND_RE = re.compile(_NUMBER + r"\s*Pa\s*wind")
+PASCAL_WATER_RE = re.compile(_NUMBER + r"\s*Pa\s*water")
+
+
+def parse_values(text: Optional[str], pattern: "re.Pattern[str]") -> List[float]:
+    """Every number the pattern finds, range ends included: "26-30 dB" -> [26.0, 30.0]"""
+    values: List[float] = []
+    for match in pattern.finditer(text or ""):
+        values.extend(float(group) for group in match.groups() if group is not None)
+    return values
+
+
+def parse_range(text: Optional[str], pattern: "re.Pattern[str]") -> Optional[List[float]]:
+    values = parse_values(text, pattern)
+    return [min(values), max(values)] if values else None
+
+
+def _first(text: Optional[str], pattern: "re.Pattern[str]") -> Optional[float]:
+    match = pattern.search(text or "")
+    return float(match.group(1)) if match else None
+
+
+def product_performance(product: Product) -> ProductPerformance:
+    specs = {spec.label.lower(): spec.value for spec in product.specs}
+    attributes: Dict[str, object] = {}
+    u_values = parse_values(specs.get("u-value"), U_VALUE_RE)
+    if u_values:
+        attributes["u_value"] = min(u_values)
+    sound = parse_values(specs.get("sound reduction"), DECIBEL_RE)
+    if sound:
+        attributes["sound_reduction_db"] = max(sound)
+    attributes["frame_depth_mm"] = parse_range(specs.get("frame depth"), MM_RE)
+
+    width = height = None
+    for label in ("max size", "max panel size"):
+        size = _SIZE_RE.search(specs.get(label, ""))
+        if size:
+            width, height = float(size.group(1)), float(size.group(2))
+    height = _first(specs.get("max height"), MM_RE) or height
+    width = _first(specs.get("max opening"), MM_RE) or _first(specs.get("max width"), MM_RE) or width
+    attributes["max_width_mm"] = width
+    attributes["max_height_mm"] = height
+
+    glass = parse_values(specs.get("glass thickness"), MM_RE) or parse_values(specs.get("glass options"), MM_RE)
+    attributes["max_glass_mm"] = max(glass) if glass else None
+    attributes["max_panel_weight_kg"] = _first(specs.get("max panel weight"), KG_RE)
+    return ProductPerformance(slug=product.slug, **attributes)
+
+
+def glass_performance(glass: GlassOption) -> GlassPerformance:
+    u_values = parse_values(glass.u_value, U_VALUE_RE)
+    transmission = parse_range(glass.light_transmission, PERCENT_RE)
+    thicknesses = [float(value) for value in parse_thicknesses(glass.thickness)]
+    return GlassPerformance(
+        id=glass.id,
+        u_value=min(u_values) if u_values else None,
+        u_value_max=max(u_values) if u_values else None,
+        light_transmission=round(sum(transmission) / 200, 4) if transmission else None,
+        sound_reduction_db=parse_range(glass.sound_reduction, DECIBEL_RE),
+        min_thickness_mm=min(thicknesses) if thicknesses else None,
+    )
+
+
+def profile_performance(profile: ProfileSystem) -> ProfilePerformance:
+    return ProfilePerformance(
+        id=profile.id,
+        depth_mm=_first(profile.depth, MM_RE),
+        chambers=profile.chambers,
+        u_value=_first(profile.u_value, U_VALUE_RE),
+        sound_reduction_db=parse_range(profile.sound_class, DECIBEL_RE),
+        max_glass_mm=_first(profile.max_glass, MM_RE),
+        wind_load_pa=_first(profile.weather_rating, PASCAL_WIND_RE),
+        water_tightness_pa=_first(profile.weather_rating, PASCAL_WATER_RE),
+    )
+
+
+class SpecIndex:
+    """Parsed performance attributes of every product, glass option and profile system, built once at load"""
+
+    def __init__(self, catalog: CatalogIndex, design_studio: DesignStudioIndex):
+        self.products: Dict[str, ProductPerformance] = {p.slug: product_performance(p) for p in catalog.products}
+        self.glass: Dict[str, GlassPerformance] = {g.id: glass_performance(g) for g in design_studio.glass}
+        self.profiles: Dict[str, ProfilePerformance] = {p.id: profile_performance(p) for p in design_studio.profiles}
+
+    def as_dict(self) -> Dict[str, List[Dict[str, object]]]:
+        return {
+            "products": [p.model_dump() for p in self.products.values()],
+            "glass": [g.model_dump() for g in self.glass.values()],
+            "profiles": [p.model_dump() for p in self.profiles.values()],
+        }
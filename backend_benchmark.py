@@ -0,0 +1,357 @@
+"""Local load benchmark for the Krystal Magic World API.
+
+Boots the FastAPI app in-process against an in-memory MongoDB
+(mongomock-motor), drives every /api route with concurrent async clients
+over httpx's ASGI transport and writes p50/p95/p99 latency, throughput and
+allocations per route to test_reports/ so runs can be diffed across commits.
+Lead routes run against mongomock, so their figures track the app's own
+overhead and regressions rather than production database latency.
+
+    python backend_benchmark.py
+    python backend_benchmark.py --requests 500 --concurrency 32
+    python backend_benchmark.py --baseline test_reports/benchmark-20260101-120000-abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import bson
+import httpx
+import mongomock_motor
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent
+REPORTS_DIR = ROOT_DIR / "test_reports"
+
+# The app reads these at import time; no journal file and no real server needed
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("LEAD_QUEUE_JOURNAL", "")
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import server  # noqa: E402
+from bson.raw_bson import RawBSONDocument  # noqa: E402
+from lead_reader import LEAD_PROJECTION, RAW_CODEC_OPTIONS, LeadReader  # noqa: E402
+
+# Builds the httpx request kwargs for the i-th request of a route
+RequestFactory = Callable[[int], Dict[str, Any]]
+
+
+class Scenario(NamedTuple):
+    route: str  # "METHOD /path" exactly as registered, used for coverage and diffs
+    build: RequestFactory
+    expected_status: int = 200
+    max_requests: Optional[int] = None  # cap for routes too slow to run at full count
+
+
+def lead_payload(i: int, prefix: str) -> Dict[str, Any]:
+    return {
+        "name": f"Benchmark Lead {i}",
+        "phone": f"+91 9{prefix}{i:08d}",
+        "email": f"lead{i}@example.com",
+        "city": ("Gurugram", "Delhi", "Noida", "Faridabad")[i % 4],
+        "lead_type": ("quote", "site_visit", "contact")[i % 3],
+        "source": "benchmark",
+    }
+
+
+def bulk_csv(i: int, rows: int = 20) -> str:
+    lines = ["name,phone,email,city,lead_type"]
+    for row in range(rows):
+        lead = lead_payload(i * rows + row, "3")
+        lines.append(f"{lead['name']},{lead['phone']},{lead['email']},{lead['city']},{lead['lead_type']}")
+    return "\n".join(lines) + "\n"
+
+
+QUOTE = {
+    "openings": [
+        {"label": f"W{i}", "product_type": ("casement", "sliding", "tilt_turn", "fixed")[i % 4],
+         "width_mm": 900 + 50 * i, "height_mm": 1200, "quantity": 1 + i % 3,
+         "hardware_ids": ["hw-child-restrictor"] if i % 2 else []}
+        for i in range(20)
+    ]
+}
+
+SIMULATION = {"city": "gurugram", "facades": [{"orientation": "W", "area_sqft": 120}, {"orientation": "N", "area_sqft": 80}]}
+
+
+def get(path: str, **params: Any) -> RequestFactory:
+    return lambda i: {"method": "GET", "url": path, "params": params}
+
+
+class InMemoryLeadReader(LeadReader):
+    """LeadReader for mongomock, which only returns dicts: rows are re-encoded so render_leads gets raw BSON"""
+
+    async def find(self, query: Dict[str, Any], sort: List[tuple], limit: int) -> List[RawBSONDocument]:
+        rows = await self.collection.find(query, LEAD_PROJECTION).sort(sort).limit(limit).to_list(length=limit)
+        return [RawBSONDocument(bson.encode(row), RAW_CODEC_OPTIONS) for row in rows]
+
+
+class KrystalAPIBenchmark:
+    def __init__(self, requests: int = 200, concurrency: int = 16, seed_leads: int = 300, alloc_samples: int = 20):
+        self.requests = requests
+        self.concurrency = concurrency
+        self.seed_leads = seed_leads
+        self.alloc_samples = alloc_samples
+        self.lead_ids: List[str] = []
+        self.results: List[Dict[str, Any]] = []
+
+    def use_in_memory_db(self) -> None:
+        """Point the app and its lead services at a fresh mongomock database"""
+        server.client = mongomock_motor.AsyncMongoMockClient(tz_aware=True)
+        server.db = server.client["krystal_benchmark"]
+        for service in (server.lead_deduplicator, server.lead_stats, server.lead_queue):
+            if service is not None:
+                service.collection = server.db.leads
+        server.lead_reader = InMemoryLeadReader(server.db.leads)
+        if server.catalog_watcher:
+            server.catalog_watcher.db = server.db
+
+    def scenarios(self) -> List[Scenario]:
+        lead_id = lambda i: self.lead_ids[i % len(self.lead_ids)]
+        return [
+            Scenario("GET /api/", get("/api/")),
+            Scenario("GET /api/health", get("/api/health")),
+            Scenario("GET /api/products", get("/api/products")),
+            Scenario("GET /api/products/{slug}", get("/api/products/casement-windows")),
+            Scenario("GET /api/projects", get("/api/projects", view="card")),
+            Scenario("GET /api/projects/{slug}", lambda i: {
+                "method": "GET", "url": f"/api/projects/{server.catalog.projects[i % len(server.catalog.projects)].slug}"}),
+            Scenario("GET /api/blog", get("/api/blog", view="card")),
+            Scenario("GET /api/blog/{slug}", lambda i: {
+                "method": "GET", "url": f"/api/blog/{server.catalog.blog_posts[i % len(server.catalog.blog_posts)].slug}"}),
+            Scenario("GET /api/faqs", get("/api/faqs")),
+            Scenario("GET /api/testimonials", get("/api/testimonials")),
+            Scenario("GET /api/cities", get("/api/cities")),
+            Scenario("GET /api/cities/{slug}", get("/api/cities/gurugram")),
+            Scenario("GET /api/design-studio/catalog", get("/api/design-studio/catalog")),
+            Scenario("GET /api/design-studio/colors", get("/api/design-studio/colors", popular="true")),
+            Scenario("GET /api/design-studio/glass", get("/api/design-studio/glass")),
+            Scenario("GET /api/design-studio/hardware", get("/api/design-studio/hardware")),
+            Scenario("GET /api/design-studio/compatibility", get(
+                "/api/design-studio/compatibility", profile="profile-70mm", glass="glass-lowe", width_mm=1200)),
+            Scenario("GET /api/design-studio/profiles", get("/api/design-studio/profiles")),
+            Scenario("GET /api/performance/specs", get("/api/performance/specs")),
+            Scenario("GET /api/search", lambda i: {
+                "method": "GET", "url": "/api/search", "params": {"q": ("upvc window", "slidng door", "cas", "noise")[i % 4]}}),
+            Scenario("GET /api/downloads", get("/api/downloads")),
+            Scenario("GET /api/settings", get("/api/settings")),
+            Scenario("GET /api/sitemap.xml", get("/api/sitemap.xml")),
+            Scenario("GET /api/metrics", get("/api/metrics")),
+            # Child sitemaps only exist past 50k URLs; this measures the miss
+            Scenario("GET /api/sitemaps/{name}.xml", get("/api/sitemaps/products-1.xml"), 404),
+            Scenario("GET /api/leads", get("/api/leads", limit=100)),
+            Scenario("GET /api/leads/stats", get("/api/leads/stats")),
+            Scenario("GET /api/leads/export", get("/api/leads/export", format="ndjson")),
+            Scenario("GET /api/leads/{lead_id}", lambda i: {"method": "GET", "url": f"/api/leads/{lead_id(i)}"}),
+            Scenario("PATCH /api/leads/{lead_id}", lambda i: {
+                "method": "PATCH", "url": f"/api/leads/{lead_id(i)}",
+                "json": {"status": ("contacted", "qualified")[i % 2]}}),
+            Scenario("POST /api/quote/estimate", lambda i: {"method": "POST", "url": "/api/quote/estimate", "json": QUOTE}),
+            Scenario("POST /api/performance/simulate", lambda i: {
+                "method": "POST", "url": "/api/performance/simulate", "json": SIMULATION}),
+            Scenario("POST /api/leads", lambda i: {"method": "POST", "url": "/api/leads", "json": lead_payload(i, "2")}),
+            Scenario("POST /api/leads/bulk", lambda i: {
+                "method": "POST", "url": "/api/leads/bulk", "content": bulk_csv(i),
+                "headers": {"Content-Type": "text/csv"}}, max_requests=20),
+        ]
+
+    def uncovered_routes(self, scenarios: List[Scenario]) -> List[str]:
+        covered = {scenario.route for scenario in scenarios}
+        registered = {
+            f"{method} {route.path}"
+            for route in server.app.routes
+            if route.path.startswith("/api") and hasattr(route, "methods")
+            for method in route.methods - {"HEAD"}
+        }
+        return sorted(registered - covered)
+
+    async def seed(self, client: httpx.AsyncClient) -> None:
+        """Create the leads that the read routes page, aggregate and export"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def create(i: int) -> None:
+            async with semaphore:
+                response = await client.post("/api/leads", json=lead_payload(i, "1"))
+                response.raise_for_status()
+                self.lead_ids.append(response.json()["id"])
+
+        await asyncio.gather(*(create(i) for i in range(self.seed_leads)))
+        if server.lead_queue:
+            await server.lead_queue.flush()
+
+    async def run_scenario(self, client: httpx.AsyncClient, scenario: Scenario) -> Dict[str, Any]:
+        latencies: List[float] = []
+        sizes: List[int] = []
+        errors: List[str] = []
+        requests = min(self.requests, scenario.max_requests or self.requests)
+        counter = iter(range(requests))
+
+        async def worker() -> None:
+            for i in counter:
+                request = scenario.build(i)
+                started = time.perf_counter()
+                response = await client.request(**request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                sizes.append(response.num_bytes_downloaded)
+                if response.status_code != scenario.expected_status:
+                    errors.append(f"{response.status_code}: {response.text[:200]}")
+
+        # Warm caches (response cache, packed search postings) before timing
+        await client.request(**scenario.build(0))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        # Allocations are traced in a separate sequential pass so tracing does not skew latency
+        peaks: List[int] = []
+        retained: List[int] = []
+        tracemalloc.start()
+        for i in range(self.alloc_samples):
+            request = scenario.build(requests + i)
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await client.request(**request)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+        tracemalloc.stop()
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            "route": scenario.route,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "error_samples": errors[:3],
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(float(np.mean(latencies)), 3),
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(np.max(latencies)), 3),
+            },
+            "response_bytes": int(np.mean(sizes)),
+            "alloc_peak_kb": round(float(np.median(peaks)) / 1024, 1),
+            "alloc_retained_kb": round(float(np.mean(retained)) / 1024, 1),
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        self.use_in_memory_db()
+        scenarios = self.scenarios()
+        await server.app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                await self.seed(client)
+                for scenario in scenarios:
+                    result = await self.run_scenario(client, scenario)
+                    self.results.append(result)
+                    print(format_row(result))
+        finally:
+            await server.app.router.shutdown()
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "requests": self.requests,
+                "concurrency": self.concurrency,
+                "seed_leads": self.seed_leads,
+                "alloc_samples": self.alloc_samples,
+            },
+            "uncovered_routes": self.uncovered_routes(scenarios),
+            "routes": self.results,
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(result: Dict[str, Any]) -> str:
+    latency = result["latency_ms"]
+    flag = "❌" if result["errors"] else "✅"
+    return (
+        f"{flag} {result['route']:<42} p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  "
+        f"p99 {latency['p99']:>8.2f}ms  {result['throughput_rps']:>8.1f} rps  "
+        f"{result['response_bytes']:>8}B  peak {result['alloc_peak_kb']:>8.1f}KB"
+    )
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print p50/p95 and allocation changes against an earlier report"""
+    previous = {result["route"]: result for result in baseline.get("routes", [])}
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('generated_at')}):")
+    for result in report["routes"]:
+        old = previous.get(result["route"])
+        if not old:
+            print(f"  {result['route']:<42} new")
+            continue
+        changes = []
+        for label, new_value, old_value in (
+            ("p50", result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            ("p95", result["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            ("peak", result["alloc_peak_kb"], old["alloc_peak_kb"]),
+        ):
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            changes.append(f"{label} {change:+7.1f}%")
+        print(f"  {result['route']:<42} " + "  ".join(changes))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every /api route against an in-memory database")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients per route")
+    parser.add_argument("--seed-leads", type=int, default=300, help="Leads created before the run")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="Traced requests per route for allocations")
+    parser.add_argument("--output", type=Path, help="Report path (default: test_reports/benchmark-<time>-<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print("=" * 60)
+    print("KRYSTAL MAGIC WORLD - API BENCHMARK")
+    print("=" * 60)
+    print(f"{args.requests} requests/route, {args.concurrency} concurrent clients, {args.seed_leads} seeded leads\n")
+
+    benchmark = KrystalAPIBenchmark(args.requests, args.concurrency, args.seed_leads, args.alloc_samples)
+    report = asyncio.run(benchmark.run())
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output = REPORTS_DIR / f"benchmark-{stamp}-{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nReport written to {output}")
+
+    if report["uncovered_routes"]:
+        print(f"⚠️  Routes without a scenario: {', '.join(report['uncovered_routes'])}")
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+
+    failed = [result["route"] for result in report["routes"] if result["errors"]]
+    if failed:
+        print(f"\n❌ Unexpected status codes on: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Shared fixtures: the backend modules on sys.path and an in-memory MongoDB (mongomock-motor)"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import bson
+import mongomock_motor
+import pytest
+from bson.raw_bson import RawBSONDocument
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+# The app reads these at import time; tests give each queue its own journal
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("LEAD_QUEUE_JOURNAL", "")
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lead_reader import LEAD_PROJECTION, RAW_CODEC_OPTIONS, LeadReader  # noqa: E402
+
+
+class InMemoryLeadReader(LeadReader):
+    """mongomock only returns dicts: rows are re-encoded so render_leads still gets raw BSON"""
+
+    async def find(self, query: Dict[str, Any], sort: List[tuple], limit: int) -> List[RawBSONDocument]:
+        rows = await self.collection.find(query, LEAD_PROJECTION).sort(sort).limit(limit).to_list(length=limit)
+        return [RawBSONDocument(bson.encode(row), RAW_CODEC_OPTIONS) for row in rows]
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)["krystal_test"]
+
+
+@pytest.fixture
+def api(db, monkeypatch):
+    """TestClient for the app with every lead service pointed at `db`"""
+    from fastapi.testclient import TestClient
+
+    import server
+    from lead_queue import LeadIngestQueue
+
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "lead_reader", InMemoryLeadReader(db.leads))
+    for service in (server.lead_deduplicator, server.lead_stats):
+        monkeypatch.setattr(service, "collection", db.leads)
+    monkeypatch.setattr(server.lead_stats, "_cache", {})
+    # A fresh queue per test that only writes when a test flushes it
+    monkeypatch.setattr(server, "lead_queue", LeadIngestQueue(
+        db.leads, flush_interval=3600,
+        on_conflict=server.lead_deduplicator.merge_or_insert,
+        on_duplicate=server.lead_deduplicator.absorb,
+    ))
+    if server.catalog_watcher:
+        monkeypatch.setattr(server.catalog_watcher, "db", db)
+    with TestClient(server.app) as client:
+        yield client
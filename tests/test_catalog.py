@@ -0,0 +1,51 @@
+"""CatalogIndex lookups and filters agree with a plain scan of the seed catalog"""
+
+import pytest
+
+from catalog import load_seed_catalog
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_seed_catalog()
+
+
+def test_slug_and_id_lookups(catalog):
+    for product in catalog.products:
+        assert catalog.product_by_slug[product.slug] is product
+        assert catalog.product_by_id[product.id] is product
+    assert catalog.product_by_slug.get("no-such-product") is None
+
+
+@pytest.mark.parametrize("category", ["windows", "doors", "skylights"])
+@pytest.mark.parametrize("featured", [None, True, False])
+def test_product_filters_match_a_scan(catalog, category, featured):
+    expected = [
+        p for p in catalog.products
+        if p.category == category and (featured is None or p.is_featured == featured)
+    ]
+    assert list(catalog.filter_products(category=category, featured=featured)) == expected
+
+
+def test_product_type_filter_keeps_order(catalog):
+    product_type = catalog.products[-1].product_type
+    expected = [p for p in catalog.products if p.product_type == product_type]
+    assert list(catalog.filter_products(product_type=product_type)) == expected
+
+
+def test_project_city_filter_ignores_case(catalog):
+    city = catalog.projects[0].city
+    assert catalog.filter_projects(city=city.upper()) == catalog.filter_projects(city=city.lower())
+    assert catalog.filter_projects(city=city)
+
+
+def test_empty_filter_values_select_everything(catalog):
+    assert catalog.filter_products(category="", product_type="") == catalog.products
+    assert catalog.filter_blog_posts(category="") == catalog.blog_posts
+    assert catalog.filter_faqs(category="") == catalog.faqs
+
+
+def test_empty_query_parameter_is_not_a_filter(api):
+    everything = api.get("/api/products").json()
+    assert everything
+    assert api.get("/api/products", params={"category": ""}).json() == everything
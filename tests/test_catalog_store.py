@@ -0,0 +1,84 @@
+"""Catalog seeding from concurrent workers and the watcher's first load"""
+
+import asyncio
+
+from catalog import load_seed_catalog
+from catalog_store import CATALOG_COLLECTIONS, CatalogWatcher, current_version, load_catalog, seed_catalog
+from seed_snapshot import seed_content
+
+
+class LateCheckDatabase:
+    """A worker that found the collections empty just before another worker seeded them"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return self.db[name]
+
+    def get_collection(self, name, **kwargs):
+        return LateCheckCollection(self.db.get_collection(name, **kwargs))
+
+
+class LateCheckCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+def test_seeding_that_loses_the_race_inserts_nothing(db):
+    async def run():
+        first = await seed_catalog(db)
+        version = await current_version(db)
+        late = await seed_catalog(LateCheckDatabase(db))
+        counts = {name: await db[name].count_documents({}) for name in CATALOG_COLLECTIONS}
+        return first, late, counts, version, await current_version(db), await load_catalog(db)
+
+    first, late, counts, version, version_after, catalog = asyncio.run(run())
+    seed = seed_content()
+    assert first == counts == {name: len(seed[name]) for name in CATALOG_COLLECTIONS}
+    assert late == {} and version_after == version == 1
+    assert [p.id for p in catalog.products] == [p.id for p in load_seed_catalog().products]
+
+
+def test_first_load_is_retried_until_it_succeeds(db):
+    attempts = []
+
+    async def reload():
+        attempts.append(await current_version(db))
+        if len(attempts) == 1:
+            raise ConnectionError("no primary")
+
+    async def run():
+        watcher = CatalogWatcher(db, reload, poll_interval=0.01, debounce=0, change_streams=False)
+        started = await watcher.start()
+        await asyncio.sleep(0.2)
+        await watcher.stop()
+        return started, watcher
+
+    started, watcher = asyncio.run(run())
+    assert started is False
+    assert len(attempts) == 2
+    assert watcher.mode == "polling" and watcher.reloads == 0
+
+
+def test_current_preloaded_catalog_is_not_reloaded(db):
+    reloads = []
+
+    async def reload():
+        reloads.append(1)
+
+    async def run():
+        await seed_catalog(db)
+        watcher = CatalogWatcher(db, reload, poll_interval=3600, change_streams=False)
+        started = await watcher.start(await current_version(db))
+        await watcher.stop()
+        return started
+
+    assert asyncio.run(run()) is True
+    assert reloads == []
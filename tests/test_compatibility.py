@@ -0,0 +1,102 @@
+"""Design studio compatibility: bitset rules against an exhaustive check, conflicts and size limits"""
+
+import itertools
+
+import pytest
+
+from catalog import load_design_studio, load_seed_catalog
+from compatibility import DIMENSIONS, CompatibilitySolver
+from specs import SpecIndex
+
+CONSTRAINED = [dim for dim in DIMENSIONS if dim != "color"]
+
+
+@pytest.fixture(scope="module")
+def solver():
+    catalog, design_studio = load_seed_catalog(), load_design_studio()
+    return CompatibilitySolver(catalog, design_studio, SpecIndex(catalog, design_studio))
+
+
+def compatible(solver, first, a, second, b):
+    row = solver.matrix.get((first, second))
+    return row is None or bool(row[solver.positions[first][a]] >> solver.positions[second][b] & 1)
+
+
+def consistent(solver, configuration):
+    return all(
+        compatible(solver, first, configuration[first], second, configuration[second])
+        for first, second in itertools.permutations(CONSTRAINED, 2)
+    )
+
+
+def test_one_selection_allows_exactly_the_options_of_some_valid_configuration(solver):
+    for dim in CONSTRAINED:
+        for option in solver.options[dim]:
+            choices = [[option] if other == dim else solver.options[other] for other in CONSTRAINED]
+            expected = {other: set() for other in CONSTRAINED}
+            for combination in itertools.product(*choices):
+                configuration = dict(zip(CONSTRAINED, combination))
+                if consistent(solver, configuration):
+                    for other in CONSTRAINED:
+                        expected[other].add(configuration[other])
+
+            options = solver.solve({dim: [option]})["options"]
+            for other in CONSTRAINED:
+                if other != dim:
+                    assert set(options[other]) == expected[other], (dim, option, other)
+            assert options["color"] == list(solver.options["color"])
+
+
+def test_glass_is_limited_by_the_profile_rebate(solver):
+    options = solver.solve({"profile": ["profile-60mm"]})["options"]
+    assert "glass-dgu-standard" in options["glass"]
+    assert "glass-triple" not in options["glass"]
+    assert "glass-triple" in solver.solve({"profile": ["profile-82mm"]})["options"]["glass"]
+
+
+def test_hardware_is_limited_by_the_product(solver):
+    options = solver.solve({"product": ["sliding-doors"]})["options"]["hardware"]
+    assert "hw-tandem-roller" in options
+    assert "hw-roto-nt-hinge" not in options and "hw-trickle-vent" not in options
+
+
+def test_incompatible_selections_are_reported_as_conflicts(solver):
+    result = solver.solve({"profile": ["profile-60mm"], "glass": ["glass-triple"]})
+    assert not result["valid"]
+    assert {(c["dimension"], c["id"]) for c in result["conflicts"]} == {
+        ("profile", "profile-60mm"), ("glass", "glass-triple"),
+    }
+
+    result = solver.solve({"product": ["sliding-doors"], "hardware": ["hw-tandem-roller", "hw-roto-nt-hinge"]})
+    assert {(c["dimension"], c["id"]) for c in result["conflicts"]} == {
+        ("product", "sliding-doors"), ("hardware", "hw-roto-nt-hinge"),
+    }
+    assert solver.solve({"product": ["casement-windows"], "glass": ["glass-lowe"]})["valid"]
+
+
+def test_opening_size_narrows_products(solver):
+    assert solver.size_mask(None, None) == solver.full["product"]
+    products = solver.solve({}, width_mm=1400, height_mm=1000)["options"]["product"]
+    assert "casement-windows" not in products
+    assert "sliding-windows" in products and "sliding-doors" in products
+
+    result = solver.solve({"product": ["casement-windows"]}, width_mm=1400)
+    assert result["conflicts"] == [{"dimension": "product", "id": "casement-windows"}]
+
+
+def test_unknown_options_are_refused(solver):
+    with pytest.raises(ValueError):
+        solver.solve({"glass": ["glass-unobtainium"]})
+    with pytest.raises(ValueError):
+        solver.solve({"texture": ["wood"]})
+
+
+def test_compatibility_endpoint(api):
+    response = api.get("/api/design-studio/compatibility", params={"profile": "profile-60mm", "glass": "glass-triple"})
+    assert response.status_code == 200
+    assert response.json()["valid"] is False
+    assert api.get(
+        "/api/design-studio/compatibility", headers={"if-none-match": response.headers["etag"]},
+        params={"profile": "profile-60mm", "glass": "glass-triple"},
+    ).status_code == 304
+    assert api.get("/api/design-studio/compatibility", params={"glass": "nope"}).status_code == 400
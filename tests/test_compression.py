@@ -0,0 +1,77 @@
+"""gzip/brotli negotiation, stored compressed variants and the response cache"""
+
+import gzip
+
+import pytest
+
+from compression import SUPPORTED_ENCODINGS, compress, encoded_etag, negotiate_encoding
+from response_cache import CachedResponse, ResponseCache
+
+BODY = b'{"items":[' + b",".join(b'{"name":"casement window %d"}' % i for i in range(200)) + b"]}"
+
+
+def decompress(body: bytes, coding: str) -> bytes:
+    if coding == "gzip":
+        return gzip.decompress(body)
+    import brotli
+    return brotli.decompress(body)
+
+
+def test_negotiation():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("*") == SUPPORTED_ENCODINGS[0]
+    if "br" in SUPPORTED_ENCODINGS:
+        assert negotiate_encoding("gzip, br") == "br"
+
+
+@pytest.mark.parametrize("coding", SUPPORTED_ENCODINGS)
+@pytest.mark.parametrize("best", [False, True])
+def test_compress_round_trip(coding, best):
+    compressed = compress(BODY, coding, best=best)
+    assert len(compressed) < len(BODY)
+    assert decompress(compressed, coding) == BODY
+
+
+def test_variants_are_built_once_and_keep_distinct_etags():
+    entry = CachedResponse(BODY)
+    body, etag, coding = entry.variant("gzip")
+    assert coding == "gzip"
+    assert etag == encoded_etag(entry.etag, "gzip") != entry.etag
+    assert entry.variant("gzip")[0] is body
+    assert entry.variant(None) == (BODY, entry.etag, None)
+    assert CachedResponse(b"{}").variant("gzip") == (b"{}", CachedResponse(b"{}").etag, None)
+
+    entry.compress_best()
+    assert decompress(entry.variant("gzip")[0], "gzip") == BODY
+
+
+def test_cache_is_lru_and_versioned():
+    cache = ResponseCache(max_entries=2)
+    hot = cache.get_or_build(1, "products", None, lambda: [1])
+    cache.get_or_build(1, "products", "a", lambda: [2])
+    assert cache.get_or_build(1, "products", None, lambda: [0]) is hot
+    cache.get_or_build(1, "products", "b", lambda: [3])
+
+    assert len(cache) == 2
+    assert cache.get_or_build(1, "products", None, lambda: [0]) is hot
+    assert cache.get_or_build(1, "products", "a", lambda: [4]).body == b"[4]"
+    assert cache.get_or_build(2, "products", None, lambda: [5]).body == b"[5]"
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize("coding", SUPPORTED_ENCODINGS)
+def test_catalog_responses_are_compressed(api, coding):
+    plain = api.get("/api/products", headers={"accept-encoding": "identity"})
+    encoded = api.get("/api/products", headers={"accept-encoding": coding})
+
+    assert "content-encoding" not in plain.headers
+    assert encoded.headers["content-encoding"] == coding
+    assert "accept-encoding" in encoded.headers["vary"].lower()
+    assert encoded.content == plain.content  # httpx decodes the body
+    assert encoded.headers["etag"] == encoded_etag(plain.headers["etag"], coding)
+
+
+def test_small_and_uncompressible_responses_pass_through(api):
+    assert "content-encoding" not in api.get("/api/", headers={"accept-encoding": "gzip"}).headers
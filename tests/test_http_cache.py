@@ -0,0 +1,51 @@
+"""Cache-Control policies and ETag revalidation on the /api router"""
+
+import pytest
+
+from http_cache import compute_etag, etag_matches, route_policy
+
+IDENTITY = {"accept-encoding": "identity"}
+
+
+def test_route_policies():
+    assert route_policy("/api/products") == "catalog"
+    assert route_policy("/api/products/casement-windows") == "catalog"
+    assert route_policy("/api/leads") == "leads"
+    assert route_policy("/api/leads/export") == "leads"
+    assert route_policy("/api/") == "no_store"
+    assert route_policy("/api/health") == "no_store"
+    assert route_policy("/api/healthz") == "catalog"
+
+
+def test_etag_matching():
+    etag = compute_etag(b"body")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert compute_etag(b"body") != compute_etag(b"body!")
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/products", {}),
+    ("/api/sitemap.xml", {}),
+    ("/api/search", {"q": "upvc window"}),
+    ("/api/design-studio/compatibility", {"glass": "glass-lowe"}),
+])
+def test_catalog_responses_revalidate(api, path, params):
+    response = api.get(path, params=params, headers=IDENTITY)
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public")
+    etag = response.headers["etag"]
+
+    revalidated = api.get(path, params=params, headers={**IDENTITY, "if-none-match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    assert api.get(path, params=params, headers={**IDENTITY, "if-none-match": '"stale"'}).status_code == 200
+
+
+def test_errors_and_leads_are_never_cached(api):
+    assert api.get("/api/products/no-such-product").headers["cache-control"] == "no-store"
+    assert api.get("/api/leads").headers["cache-control"] == "no-store"
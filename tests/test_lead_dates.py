@@ -0,0 +1,53 @@
+"""Date-range filters over leads stored with BSON dates and legacy ISO-string dates"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from lead_export import lead_filter
+from lead_stats import LeadStats
+
+LEADS = [
+    {"id": "native-old", "status": "new", "lead_type": "quote", "created_at": datetime(2023, 12, 31, 23, 0, tzinfo=timezone.utc)},
+    {"id": "native-in", "status": "new", "lead_type": "quote", "created_at": datetime(2024, 1, 10, tzinfo=timezone.utc)},
+    {"id": "legacy-old", "status": "new", "lead_type": "quote", "created_at": "2023-12-31T23:59:59.999999+00:00"},
+    {"id": "legacy-in", "status": "contacted", "lead_type": "quote", "created_at": "2024-01-02T03:04:05.123456+00:00"},
+    {"id": "legacy-late", "status": "new", "lead_type": "site_visit", "created_at": "2024-02-01T00:00:00+00:00"},
+]
+
+JANUARY = {"date_from": datetime(2024, 1, 1), "date_to": datetime(2024, 2, 1)}
+
+
+async def insert_leads(db):
+    await db.leads.insert_many([dict(lead) for lead in LEADS])
+
+
+def test_lead_filter_matches_string_dated_leads(db):
+    async def run():
+        await insert_leads(db)
+        rows = await db.leads.find(lead_filter(**JANUARY), {"_id": 0, "id": 1}).to_list(length=None)
+        assert sorted(row["id"] for row in rows) == ["legacy-in", "native-in"]
+
+        rows = await db.leads.find(lead_filter("contacted", **JANUARY), {"_id": 0, "id": 1}).to_list(length=None)
+        assert [row["id"] for row in rows] == ["legacy-in"]
+
+    asyncio.run(run())
+
+
+def test_lead_stats_count_string_dated_leads(db):
+    async def run():
+        await insert_leads(db)
+        stats = await LeadStats(db.leads).compute(lead_filter(**JANUARY))
+        assert stats["total"] == 2
+        assert stats["by_status"] == {"new": 1, "contacted": 1}
+        assert stats["by_day"] == [{"day": "2024-01-02", "count": 1}, {"day": "2024-01-10", "count": 1}]
+
+    asyncio.run(run())
+
+
+def test_export_with_date_range_includes_legacy_leads(api, db):
+    api.portal.call(insert_leads, db)
+    response = api.get("/api/leads/export", params={"date_from": "2024-01-01T00:00:00Z", "date_to": "2024-02-01T00:00:00Z"})
+
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["legacy-in", "native-in"]
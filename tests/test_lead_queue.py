@@ -0,0 +1,227 @@
+"""LeadIngestQueue: per-process journals, dedupe while queued and a writer that survives errors"""
+
+import asyncio
+import json
+import subprocess
+import sys
+from datetime import timedelta
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from lead_dedupe import LeadDeduplicator, dedupe_key
+from lead_queue import LeadIngestQueue, LeadQueueFull
+from models import now_utc
+
+
+def lead(i, phone=None):
+    doc = {
+        "id": f"lead-{i}",
+        "name": f"Lead {i}",
+        "phone": phone or f"+91980000{i:04d}",
+        "lead_type": "quote",
+        "status": "new",
+        "submission_count": 1,
+        "submissions": [],
+        "created_at": now_utc(),
+        "updated_at": now_utc(),
+    }
+    return {**doc, "dedupe_key": dedupe_key(doc)}
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return str(process.pid)
+
+
+def journal_lines(path):
+    return path.read_text().count("\n") if path.exists() else 0
+
+
+# ===================== JOURNALS =====================
+def test_flush_only_truncates_own_journal(db, tmp_path):
+    async def run():
+        base = tmp_path / "leads.journal"
+        first = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base, worker_id="first")
+        second = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base, worker_id="second")
+        await first.start()
+        await second.start()
+        await first.enqueue(lead(1))
+        await second.enqueue(lead(2))
+        assert await first.flush()
+
+        assert journal_lines(first.journal_file) == 0
+        assert journal_lines(second.journal_file) == 1
+        assert second.find_pending("lead-2") is not None
+
+        await first.drain()
+        await second.drain()
+        assert await db.leads.count_documents({}) == 2
+        assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(run())
+
+
+def test_dead_worker_journal_is_claimed_and_replayed(db, tmp_path):
+    async def run():
+        base = tmp_path / "leads.journal"
+        crashed = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base, worker_id=dead_pid())
+        await crashed.start()
+        await crashed.enqueue(lead(1))
+        await crashed.enqueue(lead(2))
+        crashed._task.cancel()  # dies without draining
+        crashed._journal.close()
+
+        replacement = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base)
+        await replacement.start()
+        assert sorted(replacement._pending) == ["lead-1", "lead-2"]
+        assert not crashed.journal_file.exists()
+
+        await replacement.drain()
+        assert await db.leads.count_documents({}) == 2
+
+    asyncio.run(run())
+
+
+def test_live_worker_journal_is_left_alone(db, tmp_path):
+    async def run():
+        base = tmp_path / "leads.journal"
+        running = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base, worker_id="running")
+        await running.start()
+        await running.enqueue(lead(1))
+
+        other = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=base)
+        await other.start()
+        assert other.depth == 0
+        assert journal_lines(running.journal_file) == 1
+
+        await other.drain()
+        await running.drain()
+        assert await db.leads.count_documents({}) == 1
+
+    asyncio.run(run())
+
+
+# ===================== DEDUPE WHILE QUEUED =====================
+def test_repeat_submission_merges_into_queued_lead(db, tmp_path):
+    async def run():
+        deduplicator = LeadDeduplicator(db.leads, window=timedelta(days=30))
+        queue = LeadIngestQueue(
+            db.leads, flush_interval=3600, journal_path=tmp_path / "leads.journal", worker_id="w",
+            on_conflict=deduplicator.merge_or_insert, on_duplicate=deduplicator.absorb,
+        )
+        await queue.start()
+        assert await queue.enqueue(lead(1, "+919811111111")) is None
+        merged = await queue.enqueue({**lead(2, "+919811111111"), "message": "Second visit"})
+
+        assert merged["id"] == "lead-1"
+        assert merged["submission_count"] == 2
+        assert queue.depth == 1
+
+        # A restart before the flush replays the merged lead, not two
+        queue._task.cancel()
+        queue._journal.close()
+        restarted = LeadIngestQueue(db.leads, flush_interval=3600, journal_path=tmp_path / "leads.journal", worker_id="w")
+        await restarted.start()
+        assert restarted.find_pending("lead-1")["submission_count"] == 2
+
+        await restarted.drain()
+        stored = await db.leads.find({}, {"_id": 0}).to_list(length=None)
+        assert [(doc["id"], doc["submission_count"]) for doc in stored] == [("lead-1", 2)]
+
+    asyncio.run(run())
+
+
+def test_repeat_submission_through_the_api_keeps_the_first_id(api):
+    import server
+
+    payload = {"name": "Asha", "phone": "98111 22222", "lead_type": "quote"}
+    first = api.post("/api/leads", json=payload).json()
+    second = api.post("/api/leads", json={**payload, "message": "Any update?"}).json()
+
+    assert second["id"] == first["id"]
+    assert second["submission_count"] == 2
+    assert api.get(f"/api/leads/{first['id']}").status_code == 200
+
+    api.portal.call(server.lead_queue.flush)
+    assert api.get(f"/api/leads/{first['id']}").json()["submission_count"] == 2
+    assert api.patch(f"/api/leads/{first['id']}", json={"status": "contacted"}).status_code == 200
+
+
+
+def test_repeat_of_a_stored_lead_merges_at_flush_and_keeps_its_id(api):
+    import server
+
+    payload = {"name": "Ravi", "phone": "+91 98111 33333", "lead_type": "quote"}
+    first = api.post("/api/leads", json=payload).json()
+    api.portal.call(server.lead_queue.flush)
+    second = api.post("/api/leads", json={**payload, "lead_type": "site_visit"}).json()
+    api.portal.call(server.lead_queue.flush)
+
+    lead = api.get(f"/api/leads/{second['id']}").json()
+    assert lead["id"] == first["id"]
+    assert lead["submission_count"] == 2
+    assert "dedupe_key" not in lead
+    updated = api.patch(f"/api/leads/{second['id']}", json={"status": "contacted"}).json()
+    assert updated["id"] == first["id"]
+    assert api.get(f"/api/leads/{first['id']}").json()["status"] == "contacted"
+
+
+def test_internal_fields_stay_out_of_lead_responses(api):
+    import server
+
+    created = api.post("/api/leads", json={"name": "Meera", "phone": "9811144444", "lead_type": "contact"}).json()
+    assert "dedupe_key" not in api.get(f"/api/leads/{created['id']}").json()  # still queued
+    api.portal.call(server.lead_queue.flush)
+    assert "dedupe_key" not in api.get(f"/api/leads/{created['id']}").json()
+    row = json.loads(api.get("/api/leads/export").text.splitlines()[0])
+    assert row["id"] == created["id"]
+    assert "dedupe_key" not in row and "_id" not in row
+
+
+# ===================== WRITER =====================
+def test_writer_survives_unexpected_errors(db):
+    class FlakyCollection:
+        calls = 0
+
+        async def insert_many(self, docs, ordered):
+            FlakyCollection.calls += 1
+            if FlakyCollection.calls < 3:
+                raise RuntimeError("connection reset")
+            return await db.leads.insert_many(docs, ordered=ordered)
+
+    async def run():
+        queue = LeadIngestQueue(FlakyCollection(), flush_interval=0.01)
+        await queue.start()
+        await queue.enqueue(lead(1))
+        for _ in range(100):
+            if queue.depth == 0:
+                break
+            await asyncio.sleep(0.05)
+
+        assert not queue._task.done()
+        assert queue.failed_flushes == 2
+        assert await db.leads.count_documents({"id": "lead-1"}) == 1
+        await queue.drain()
+
+    asyncio.run(run())
+
+
+def test_full_queue_refuses_leads_while_mongo_is_down():
+    class DownCollection:
+        async def insert_many(self, docs, ordered):
+            raise AutoReconnect("no primary")
+
+    async def run():
+        queue = LeadIngestQueue(DownCollection(), flush_interval=3600, max_depth=2)
+        await queue.enqueue(lead(1))
+        await queue.enqueue(lead(2))
+        with pytest.raises(LeadQueueFull):
+            await queue.enqueue(lead(3))
+
+        assert queue.depth == 2
+        assert queue.find_pending("lead-3") is None
+        assert queue.stats()["rejected"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+"""Lead analytics: counts, the status funnel and the shape of the aggregation pipelines"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from lead_export import lead_filter
+from lead_stats import LeadStats, build_funnel
+
+STATUSES = ["new", "new", "contacted", "quoted", "won", "lost"]
+
+
+class RecordingCollection:
+    """Passes aggregations through to a collection and keeps the pipelines it ran"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return self.collection.aggregate(pipeline)
+
+
+async def insert_leads(db):
+    await db.leads.insert_many([
+        {"id": f"lead-{i}", "status": status, "lead_type": "quote", "city": "Gurugram", "source": "website",
+         "created_at": datetime(2024, 1, 1 + i, tzinfo=timezone.utc)}
+        for i, status in enumerate(STATUSES)
+    ])
+
+
+def test_counts_and_funnel(db):
+    async def run():
+        await insert_leads(db)
+        return await LeadStats(db.leads).compute({})
+
+    stats = asyncio.run(run())
+    assert stats["total"] == 6
+    assert stats["by_status"] == {"new": 2, "contacted": 1, "quoted": 1, "won": 1, "lost": 1}
+    assert stats["by_city"] == {"Gurugram": 6}
+    assert [(stage["stage"], stage["count"]) for stage in stats["funnel"]] == [
+        ("new", 6), ("contacted", 3), ("site_visit_scheduled", 2), ("quoted", 2), ("won", 1),
+    ]
+    assert len(stats["by_day"]) == 6
+
+
+def test_funnel_of_no_leads():
+    assert all(stage["count"] == 0 and stage["rate"] == 0.0 for stage in build_funnel({}))
+
+
+def test_status_counts_follow_the_indexes(db):
+    recorder = RecordingCollection(db.leads)
+    stats = LeadStats(recorder)
+
+    async def run():
+        await insert_leads(db)
+        await stats.compute({})
+        await stats.compute(lead_filter(date_from=datetime(2024, 1, 3)))
+
+    asyncio.run(run())
+    unfiltered, filtered = recorder.pipelines[0], recorder.pipelines[4]
+    # Sorted on the status index and narrowed to status before grouping: a covered scan
+    assert unfiltered[:2] == [{"$sort": {"status": 1}}, {"$project": {"_id": 0, "status": 1}}]
+    # A created_at range uses the created_at index; no in-memory sort on status
+    assert "$match" in filtered[0]
+    assert not any("$sort" in stage for stage in filtered)
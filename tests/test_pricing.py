@@ -0,0 +1,84 @@
+"""Quote pricing: line arithmetic, batch pricing and options without a rate"""
+
+import pytest
+
+from catalog import DesignStudioIndex, load_design_studio
+from pricing import (
+    GLAZED_FRACTION, GLASS_RATES, GST_RATE, INSTALLATION_RATE, MIN_CHARGEABLE_SQ_FT, PROFILE_RATES,
+    SQ_MM_PER_SQ_FT, PricingEngine, PricingError,
+)
+
+
+@pytest.fixture(scope="module")
+def design_studio():
+    return load_design_studio()
+
+
+@pytest.fixture(scope="module")
+def engine(design_studio):
+    return PricingEngine(design_studio)
+
+
+OPENING = {
+    "product_type": "casement", "category": "windows", "width_mm": 1200, "height_mm": 1500, "quantity": 2,
+    "profile_id": "profile-70mm", "glass_id": "glass-lowe", "color_id": "color-brilliant-white", "hardware_ids": [],
+}
+
+
+def test_single_line_arithmetic(engine):
+    estimate = engine.estimate([OPENING])
+    line = estimate["lines"][0]
+    area = 1200 * 1500 / SQ_MM_PER_SQ_FT
+
+    assert line["frame"] == round(area * PROFILE_RATES["profile-70mm"])
+    assert line["glass"] == round(area * GLAZED_FRACTION * GLASS_RATES["glass-lowe"])
+    assert line["installation"] == round(area * INSTALLATION_RATE)
+    assert line["finish"] == 0 and line["hardware"] == 0
+    assert line["amount"] == line["unit_price"] * 2
+    summary = estimate["summary"]
+    assert summary["subtotal"] == line["amount"]
+    assert summary["total"] == summary["subtotal"] + round(summary["subtotal"] * GST_RATE)
+
+
+def test_small_openings_are_billed_at_the_minimum(engine):
+    line = engine.estimate([{**OPENING, "width_mm": 300, "height_mm": 300}])["lines"][0]
+    assert line["chargeable_sqft"] == MIN_CHARGEABLE_SQ_FT
+    assert line["frame"] == round(MIN_CHARGEABLE_SQ_FT * PROFILE_RATES["profile-70mm"])
+
+
+def test_a_schedule_prices_like_its_openings_one_by_one(engine):
+    schedule = [
+        OPENING,
+        {**OPENING, "product_type": "sliding", "category": "doors", "glass_id": None, "quantity": 1},
+        {**OPENING, "product_type": "tilt_turn", "hardware_ids": ["hw-child-restrictor", "hw-trickle-vent"]},
+    ]
+    together = engine.estimate(schedule)["lines"]
+    assert together == [engine.estimate([opening])["lines"][0] for opening in schedule]
+    assert together[2]["hardware"] == 450 + 900
+
+
+@pytest.mark.parametrize("change", [
+    {"glass_id": "glass-unobtainium"},
+    {"product_type": "revolving"},
+    {"hardware_ids": ["hw-missing"]},
+])
+def test_unknown_options_are_refused(engine, change):
+    with pytest.raises(PricingError):
+        engine.estimate([{**OPENING, **change}])
+
+
+def test_unpriced_catalog_option_only_fails_quotes_that_use_it(design_studio):
+    new_glass = design_studio.glass[0].model_copy(update={"id": "glass-electrochromic"})
+    engine = PricingEngine(DesignStudioIndex(
+        colors=design_studio.colors, glass=[*design_studio.glass, new_glass],
+        hardware=design_studio.hardware, profiles=design_studio.profiles,
+    ))
+
+    assert engine.estimate([OPENING])["lines"][0]["unit_price"] > 0
+    with pytest.raises(PricingError, match="glass-electrochromic"):
+        engine.estimate([{**OPENING, "glass_id": "glass-electrochromic"}])
+
+
+def test_estimate_endpoint(api):
+    assert api.post("/api/quote/estimate", json={"openings": [OPENING]}).json()["summary"]["openings"] == 2
+    assert api.post("/api/quote/estimate", json={"openings": [{**OPENING, "glass_id": "nope"}]}).status_code == 400
@@ -0,0 +1,76 @@
+"""Site search: ranking, prefix and typo matching, type filters and incremental sync"""
+
+import pytest
+
+from search import SearchDocument, SearchIndex, stem, tokenize
+
+
+def document(type, id, title, body=""):
+    return SearchDocument(type, id, id, title, body, f"/{type}/{id}", [(title, 3.0), (body, 1.0)])
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.sync([
+        document("product", "casement", "Casement Windows", "Outward opening uPVC windows with multi-point locks"),
+        document("product", "sliding", "Sliding Doors", "Large glass sliding doors for balconies"),
+        document("blog", "acoustic", "Acoustic comfort at home", "Laminated glass reduces traffic noise"),
+        document("faq", "warranty", "What warranty do you offer?", "Ten years on profiles and hardware"),
+    ])
+    return index
+
+
+def keys(results):
+    return [f"{result['type']}:{result['id']}" for result in results]
+
+
+def test_tokenize_and_stem():
+    assert tokenize("The uPVC Windows, glazing!") == ["upvc", "windows", "glazing"]
+    assert stem("windows") == "window"
+    assert stem("glazing") == stem("glazed") == "glaz"
+    assert stem("doors") == "door"
+    assert stem("glass") == "glass"
+
+
+def test_title_matches_rank_first(index):
+    results = index.search("windows")
+    assert keys(results)[0] == "product:casement"
+    assert results == sorted(results, key=lambda result: -result["score"])
+
+
+def test_prefix_of_the_last_word_matches(index):
+    assert keys(index.search("casem")) == ["product:casement"]
+    assert "product:sliding" in keys(index.search("glass slid"))
+
+
+def test_single_typo_matches(index):
+    assert keys(index.search("slidng"))[0] == "product:sliding"
+    assert keys(index.search("warrenty")) == ["faq:warranty"]
+
+
+def test_type_filter_and_limit(index):
+    assert keys(index.search("glass", types={"blog"})) == ["blog:acoustic"]
+    assert len(index.search("glass", limit=1)) == 1
+    assert index.search("the of and") == []
+
+
+def test_sync_reindexes_only_changes(index):
+    upserted, removed = index.sync([
+        document("product", "casement", "Casement Windows", "Outward opening uPVC windows with multi-point locks"),
+        document("product", "sliding", "Lift and Slide Doors", "Large glass sliding doors for balconies"),
+        document("faq", "warranty", "What warranty do you offer?", "Ten years on profiles and hardware"),
+    ])
+    assert (upserted, removed) == (1, 1)
+    assert len(index) == 3
+    assert index.search("acoustic") == []
+    assert keys(index.search("lift")) == ["product:sliding"]
+
+
+def test_search_endpoint(api):
+    response = api.get("/api/search", params={"q": "upvc window", "type": "product"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["query"] == "upvc window"
+    assert body["results"] and all(result["type"] == "product" for result in body["results"])
+    assert api.get("/api/search").status_code == 422
@@ -0,0 +1,71 @@
+"""Seed snapshot: JSON round trip, fallbacks for missing or stale files and the read-only budget check"""
+
+import json
+
+import pytest
+
+import seed_snapshot
+from seed_snapshot import build_snapshot, check_import_budget, load_from_source, load_snapshot
+
+
+@pytest.fixture(scope="module")
+def source():
+    return load_from_source()
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / "seed_snapshot.json"
+    monkeypatch.setattr(seed_snapshot, "SNAPSHOT_PATH", path)
+    return path
+
+
+def dump(content):
+    return {name: value.model_dump() if not isinstance(value, list) else [item.model_dump() for item in value]
+            for name, value in content.items()}
+
+
+def test_round_trip_rebuilds_equal_models(source, snapshot_path):
+    size = build_snapshot(source, snapshot_path)
+    assert snapshot_path.stat().st_size == size
+    assert [p.name for p in snapshot_path.parent.iterdir()] == [snapshot_path.name]  # no temporary left behind
+
+    loaded = load_snapshot(snapshot_path)
+    assert dump(loaded) == dump(source)
+    product = loaded["products"][0]
+    assert type(product) is type(source["products"][0])
+    assert product.created_at.tzinfo is not None
+    assert type(product.specs[0]) is type(source["products"][0].specs[0])
+
+
+def test_datetimes_are_tagged_in_the_json(source, snapshot_path):
+    build_snapshot(source, snapshot_path)
+    product = json.loads(snapshot_path.read_bytes())["sections"]["products"][0]
+    assert set(product["created_at"]) == {seed_snapshot.DATETIME_TAG}
+
+
+def test_missing_stale_or_corrupt_snapshots_are_ignored(source, snapshot_path):
+    assert load_snapshot(snapshot_path) is None
+
+    build_snapshot(source, snapshot_path)
+    snapshot = json.loads(snapshot_path.read_bytes())
+    snapshot_path.write_text(json.dumps({**snapshot, "fingerprint": "stale"}))
+    assert load_snapshot(snapshot_path) is None
+
+    snapshot_path.write_bytes(b"\x80not json")
+    assert load_snapshot(snapshot_path) is None
+
+
+def test_budget_check_does_not_write_the_snapshot(snapshot_path, monkeypatch):
+    monkeypatch.setattr(seed_snapshot, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(seed_snapshot, "profile_import", lambda: pytest.fail("timed a boot without the snapshot"))
+    assert check_import_budget() is False
+    assert not snapshot_path.exists()
+
+
+def test_budget_covers_dependencies(source, snapshot_path, monkeypatch):
+    build_snapshot(source, snapshot_path)
+    profile = {"total_ms": 400.0, "app_ms": 50.0, "app_modules": {"server": 50.0}}
+    monkeypatch.setattr(seed_snapshot, "profile_import", lambda: profile)
+    assert check_import_budget(budget_ms=450, runs=1)
+    assert not check_import_budget(budget_ms=100, runs=1)
@@ -0,0 +1,77 @@
+"""Sitemap rendering, sharding and the gzip/identity streams"""
+
+import asyncio
+import gzip
+import re
+from xml.etree import ElementTree
+
+import pytest
+
+from catalog import load_seed_catalog
+from sitemap import Sitemap, SitemapCache, SitemapDocument, collect_sections
+
+NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_seed_catalog()
+
+
+def locations(document: SitemapDocument):
+    root = ElementTree.fromstring(gzip.decompress(document.gzipped))
+    return [element.text for element in root.iter(f"{NS}loc")]
+
+
+async def collect(stream):
+    return b"".join([chunk async for chunk in stream])
+
+
+def test_single_sitemap_lists_every_url(catalog):
+    sitemap = Sitemap(catalog, "https://example.test")
+    expected = [url[0] for urls in collect_sections(catalog, "https://example.test").values() for url in urls]
+
+    assert not sitemap.is_sharded
+    assert locations(sitemap.root) == expected
+    assert f"https://example.test/products/{catalog.products[0].slug}" in expected
+
+
+def test_large_catalog_is_sharded_into_an_index(catalog):
+    sitemap = Sitemap(catalog, "https://example.test", max_urls=3)
+    sections = collect_sections(catalog, "https://example.test")
+
+    assert sitemap.is_sharded
+    children = locations(sitemap.root)
+    assert children == [f"https://example.test/api/sitemaps/{name}.xml" for name in sitemap.documents]
+    assert all(len(locations(document)) <= 3 for document in sitemap.documents.values())
+    assert [loc for document in sitemap.documents.values() for loc in locations(document)] == [
+        url[0] for urls in sections.values() for url in urls
+    ]
+
+
+def test_identity_stream_matches_gzip_body(catalog):
+    document = Sitemap(catalog).root
+    identity = asyncio.run(collect(document.iter_identity()))
+    gzipped = asyncio.run(collect(document.iter_gzip()))
+
+    assert gzipped == document.gzipped
+    assert identity == gzip.decompress(gzipped)
+    assert len(identity) == document.size
+
+
+def test_cache_rebuilds_only_for_a_new_catalog_version(catalog):
+    cache = SitemapCache()
+    first = cache.get(catalog)
+    assert cache.get(catalog) is first
+    assert cache.get(load_seed_catalog()) is not first
+
+
+def test_sitemap_endpoint_negotiates_gzip(api):
+    plain = api.get("/api/sitemap.xml", headers={"accept-encoding": "identity"})
+    compressed = api.get("/api/sitemap.xml", headers={"accept-encoding": "gzip"})
+
+    assert plain.status_code == compressed.status_code == 200
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == plain.content  # httpx inflates the gzip body
+    assert re.fullmatch(r'"[0-9a-f]+-gz"', compressed.headers["etag"])
+    assert api.get("/api/sitemaps/products-1.xml").status_code == 404